@@ -0,0 +1,68 @@
+"""
+Benchmark of the ANTLR and ast parse backends, from code string to fingerprint,
+next to the token winnowing engine that skips the parser
+
+Run from the plagium_core directory:
+
+    python -m benchmarks.parse_backends
+"""
+from glob import glob
+from os.path import dirname, join
+from random import Random
+from time import perf_counter
+from src.use_case.compare_trees import fingerprintTree
+from src.use_case.parse_code import PARSE_BACKENDS, parseCode
+from src.use_case.winnow_tokens import winnowCode
+
+EXAMPLES = join(dirname(dirname(__file__)), "test", "example*.py")
+FILES = 10
+FUNCTIONS = 25
+
+def syntheticFunction(random: Random, number: int) -> str:
+    names = ["total", "items", "value", "count", "result", "index"]
+    first, second, third = random.sample(names, 3)
+    operator = random.choice(["+", "-", "*", "//", "%"])
+
+    return (
+        f"def function_{number}({first}, {second}=0):\n"
+        f"    {third} = []\n"
+        f"    for i in range(len({first})):\n"
+        f"        if {first}[i] {random.choice(['>', '<', '=='])} {second}:\n"
+        f"            {third}.append({first}[i] {operator} {random.randint(1, 99)})\n"
+        f"        else:\n"
+        f"            {third}.append(\"{random.choice(names)}\")\n"
+        f"    return {{\"size\": len({third}), \"items\": {third}}}\n"
+    )
+
+def syntheticCorpus(files: int = FILES, functions: int = FUNCTIONS, seed: int = 0) -> list[str]:
+    random = Random(seed)
+
+    return ["\n".join(syntheticFunction(random, number) for number in range(functions)) for _ in range(files)]
+
+def fingerprintSeconds(codes: list[str], backend: str) -> tuple[float, int]:
+    started = perf_counter()
+
+    if backend == "winnow":
+        hashes = sum(len(winnowCode(code)) for code in codes)
+    else:
+        hashes = sum(len(fingerprintTree(parseCode(code, backend=backend))) for code in codes)
+
+    return perf_counter() - started, hashes
+
+if __name__ == "__main__":
+    examples = [open(path).read() for path in sorted(glob(EXAMPLES))]
+    corpus = syntheticCorpus()
+
+    # Primera pasada para calentar las cachés de ANTLR
+    for code in examples:
+        parseCode(code)
+
+    for title, codes in (("test examples", examples), ("synthetic corpus", corpus)):
+        lines = sum(code.count("\n") for code in codes)
+        print(f"{title}: {len(codes)} files, {lines} lines")
+
+        timings = {backend: fingerprintSeconds(codes, backend) for backend in [*PARSE_BACKENDS, "winnow"]}
+        for backend, (seconds, hashes) in timings.items():
+            print(f"  {backend:6} {seconds:8.3f} s  {lines / seconds:10.0f} lines/s  {hashes:6} hashes")
+
+        print(f"  speedup over antlr: ast {timings['antlr'][0] / timings['ast'][0]:.0f}x, winnow {timings['antlr'][0] / timings['winnow'][0]:.1f}x")
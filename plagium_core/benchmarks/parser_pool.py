@@ -0,0 +1,38 @@
+"""
+Microbenchmark of the per-file overhead saved by reusing the lexer and parser
+
+Run from the plagium_core directory:
+
+    python -m benchmarks.parser_pool
+"""
+from timeit import repeat
+from antlr4 import CommonTokenStream, InputStream
+from src.parser.Python3Lexer import Python3Lexer
+from src.parser.Python3Parser import Python3Parser
+from src.use_case.parse_code import getRecognizers, parseCode
+
+CODE = "def f(x):\n    return x + 1\n"
+NUMBER = 2000
+
+def buildRecognizers():
+    lexer = Python3Lexer(InputStream(CODE))
+    parser = Python3Parser(CommonTokenStream(lexer))
+    return lexer, parser
+
+def reuseRecognizers():
+    return getRecognizers(CODE)
+
+def bestMicroseconds(function, number: int = NUMBER) -> float:
+    return min(repeat(function, number=number, repeat=5)) / number * 1e6
+
+if __name__ == "__main__":
+    parseCode(CODE)
+
+    built = bestMicroseconds(buildRecognizers)
+    reused = bestMicroseconds(reuseRecognizers)
+    print(f"setup, new lexer and parser: {built:8.1f} us/file")
+    print(f"setup, reused from the pool: {reused:8.1f} us/file")
+    print(f"saved per file:              {built - reused:8.1f} us")
+
+    parsed = bestMicroseconds(lambda: parseCode(CODE), 20)
+    print(f"parseCode of a small file:   {parsed:8.1f} us/file")
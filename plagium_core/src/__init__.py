@@ -1,5 +1,8 @@
+from glob import glob
+from threading import Thread
 from flask import Flask
 from src.routes import bp
+from src.use_case.warm_up import warmUpUseCase
 from dotenv import dotenv_values
 from flask_cors import CORS
 
@@ -11,5 +14,13 @@ def create_app() -> Flask:
     
     app.config.from_pyfile("settings.py")
     app.register_blueprint(bp)
+
+    # Llena las cachés del parser en segundo plano, /v1.1/ready indica cuándo termina
+    app.extensions["warm_up"] = {"status": "warming", "files": 0}
+    if app.config["WARM_UP"]:
+        paths = sorted(glob(app.config["WARM_UP_FILES"]))
+        Thread(target=warmUpUseCase, args=(paths, app.extensions["warm_up"]), daemon=True).start()
+    else:
+        app.extensions["warm_up"]["status"] = "ready"
     
     return app
\ No newline at end of file
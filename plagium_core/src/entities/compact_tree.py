@@ -0,0 +1,39 @@
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+@dataclass
+class CompactTree:
+    """
+    Parse tree stored as parallel arrays, one position per node in pre-order
+
+    The children of a node start right after it and each one is followed by
+    its own subtree, so they are found by jumping over the subtree sizes.
+    """
+    keys: array = field(default_factory=lambda: array("i"))
+    parents: array = field(default_factory=lambda: array("i"))
+    sizes: array = field(default_factory=lambda: array("i"))
+    start_lines: array = field(default_factory=lambda: array("i"))
+    stop_lines: array = field(default_factory=lambda: array("i"))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def children(self, index: int) -> Iterator[int]:
+        child = index + 1
+        end = index + self.sizes[index]
+
+        while child < end:
+            yield child
+            child += self.sizes[child]
+
+    def fillSizes(self):
+        # Desde el último nodo al primero, cada subárbol ya está completo
+        self.sizes = array("i", [1]) * len(self.keys)
+        for index in range(len(self.keys) - 1, 0, -1):
+            self.sizes[self.parents[index]] += self.sizes[index]
+
+    def nbytes(self) -> int:
+        return sum(values.itemsize * len(values) for values in (
+            self.keys, self.parents, self.sizes, self.start_lines, self.stop_lines
+        ))
@@ -1,11 +1,13 @@
-from dataclasses import dataclass
-from antlr4 import ParserRuleContext
+from dataclasses import dataclass, field
+from src.entities.compact_tree import CompactTree
 
 @dataclass
 class File:
     name: str
-    tree: ParserRuleContext
+    tree: CompactTree | None
     hash: str
+    fingerprint: set[int] = field(default_factory=set)
+    metrics: dict = field(default_factory=dict)
 
     def __eq__(self, other):
         if not isinstance(other, File):
@@ -14,4 +16,4 @@ class File:
         return self.hash == other.hash
     
     def __hash__(self):
-        return self.hash
\ No newline at end of file
+        return hash(self.hash)
\ No newline at end of file
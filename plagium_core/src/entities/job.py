@@ -0,0 +1,24 @@
+from dataclasses import dataclass, field
+from time import time
+from uuid import uuid4
+
+@dataclass
+class Job:
+    files_total: int
+    id: str = field(default_factory=lambda: uuid4().hex)
+    status: str = "queued"
+    files_parsed: int = 0
+    pairs_total: int | None = None
+    pairs_scored: int = 0
+    report: list[dict] | None = None
+    files: list[dict] | None = None
+    errors: list[dict] | None = None
+    stages: dict | None = None
+    error: str | None = None
+    created: float = field(default_factory=time)
+    finished: float | None = None
+
+    @property
+    def done(self) -> bool:
+        # Se marca al final, cuando el estado ya no cambia
+        return self.finished is not None
\ No newline at end of file
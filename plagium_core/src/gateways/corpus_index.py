@@ -0,0 +1,221 @@
+import sqlite3
+from contextlib import closing
+from math import ceil
+
+# Tolerancia para que el prefijo nunca descarte una entrega por redondeo
+EPSILON = 1e-9
+
+# Entregas a partir de las que se ignoran los hashes más frecuentes
+MIN_STOP_SUBMISSIONS = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    version TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    UNIQUE (digest, version)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    hash INTEGER NOT NULL,
+    submission INTEGER NOT NULL REFERENCES submissions (id),
+    PRIMARY KEY (hash, submission)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS frequencies (
+    version TEXT NOT NULL,
+    hash INTEGER NOT NULL,
+    submissions INTEGER NOT NULL,
+    PRIMARY KEY (version, hash)
+) WITHOUT ROWID;
+"""
+
+def toSigned(hash_value: int) -> int:
+    """
+    Map an unsigned 64-bit hash to the signed range stored by SQLite
+
+    Parameters:
+        hash_value (int): Unsigned 64-bit hash
+
+    Returns:
+        int: Signed 64-bit integer with the same bits
+    """
+    return hash_value - (1 << 64) if hash_value >= 1 << 63 else hash_value
+
+class CorpusIndex:
+    """
+    On-disk inverted index from subtree hashes to the stored submissions
+
+    Each index only sees the submissions of its own version of the
+    fingerprints, those of other engines or backends share the file but are
+    never matched against them.
+    """
+
+    def __init__(self, path: str, version: str):
+        self.path = path
+        self.version = version
+
+        with closing(self.connect()) as connection:
+            connection.executescript(SCHEMA)
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open a new connection to the index, one per operation so it can be
+        used from any thread
+        """
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    def add(self, name: str, digest: str, fingerprint: set[int]) -> int:
+        """
+        Store a submission, the postings of its subtree hashes and the
+        number of submissions of each hash
+
+        Parameters:
+            name (str): File name of the submission
+            digest (str): Content digest, submissions already stored with this version are not added again
+            fingerprint (set[int]): Subtree hashes of the submission
+
+        Returns:
+            int: Id of the submission
+        """
+        with closing(self.connect()) as connection, connection:
+            # Insertar y comprobar en un solo paso evita la carrera entre dos altas iguales
+            cursor = connection.execute(
+                """
+                INSERT INTO submissions (name, digest, version, size) VALUES (?, ?, ?, ?)
+                ON CONFLICT (digest, version) DO NOTHING
+                """,
+                (name, digest, self.version, len(fingerprint))
+            )
+            if cursor.rowcount == 0:
+                return connection.execute(
+                    "SELECT id FROM submissions WHERE digest = ? AND version = ?",
+                    (digest, self.version)
+                ).fetchone()[0]
+
+            submission = cursor.lastrowid
+            connection.executemany(
+                "INSERT INTO postings (hash, submission) VALUES (?, ?)",
+                ((toSigned(hash_value), submission) for hash_value in fingerprint)
+            )
+            connection.executemany(
+                """
+                INSERT INTO frequencies (version, hash, submissions) VALUES (?, ?, 1)
+                ON CONFLICT (version, hash) DO UPDATE SET submissions = submissions + 1
+                """,
+                ((self.version, toSigned(hash_value)) for hash_value in fingerprint)
+            )
+
+        return submission
+
+    def count(self) -> int:
+        """
+        Get the number of stored submissions of this version
+        """
+        with closing(self.connect()) as connection:
+            return connection.execute("SELECT COUNT(*) FROM submissions WHERE version = ?", (self.version,)).fetchone()[0]
+
+    def matches(self, fingerprint: set[int], min_similarity: float = 0, max_frequency: float = 1) -> list[tuple[int, str, int, int]]:
+        """
+        Merge the posting lists of the subtree hashes of a fingerprint
+
+        Only the postings of the given hashes are read through the primary
+        key, so the cost depends on those lists and not on the corpus size.
+        The hashes are ordered from the rarest to the most common, and only
+        those of the prefix that any submission of at least min_similarity
+        must share, as in compareJoinUseCase, look for candidates. Once the
+        corpus holds MIN_STOP_SUBMISSIONS submissions, hashes stored in more
+        than max_frequency of them are not used to look for candidates
+        either. The hashes in common with each candidate are then counted
+        over the whole fingerprint, so the counts are exact.
+
+        Parameters:
+            fingerprint (set[int]): Subtree hashes to look for
+            min_similarity (float): Percentage of similarity the submissions need
+            max_frequency (float): Fraction of the submissions above which a
+            hash is too common to look for candidates
+
+        Returns:
+            list[tuple[int, str, int, int]]: Id, name, size and number of
+            hashes in common of every candidate submission of this version,
+            every submission sharing at least one hash when nothing is pruned
+        """
+        with closing(self.connect()) as connection:
+            connection.execute("CREATE TEMP TABLE query (hash INTEGER PRIMARY KEY, submissions INTEGER)")
+            connection.executemany(
+                "INSERT OR IGNORE INTO query (hash) VALUES (?)",
+                ((toSigned(hash_value),) for hash_value in fingerprint)
+            )
+            connection.execute(
+                """
+                UPDATE query SET submissions = COALESCE(
+                    (SELECT submissions FROM frequencies WHERE version = ? AND hash = query.hash), 0
+                )
+                """,
+                (self.version,)
+            )
+
+            # Prefijo de hashes raros que comparte cualquier entrega por encima del umbral
+            size = len(fingerprint)
+            t = min_similarity / 100
+            prefix = size - ceil(t * size - EPSILON) + 1 if t > 0 else size
+
+            total = connection.execute("SELECT COUNT(*) FROM submissions WHERE version = ?", (self.version,)).fetchone()[0]
+            max_submissions = max_frequency * total if total >= MIN_STOP_SUBMISSIONS else total
+
+            connection.execute(
+                """
+                CREATE TEMP TABLE probe AS
+                SELECT hash FROM (SELECT hash, submissions FROM query ORDER BY submissions, hash LIMIT ?)
+                WHERE submissions > 0 AND submissions <= ?
+                """,
+                (prefix, max_submissions)
+            )
+            probed, common = connection.execute(
+                "SELECT (SELECT COUNT(*) FROM probe), (SELECT COUNT(*) FROM query WHERE submissions > 0)"
+            ).fetchone()
+
+            # Sin poda basta con mezclar todas las listas de una vez
+            if probed == common:
+                return connection.execute(
+                    """
+                    SELECT submissions.id, submissions.name, submissions.size, counts.matches
+                    FROM (
+                        SELECT postings.submission AS submission, COUNT(*) AS matches
+                        FROM query CROSS JOIN postings ON postings.hash = query.hash
+                        GROUP BY postings.submission
+                    ) AS counts
+                    JOIN submissions ON submissions.id = counts.submission
+                    WHERE submissions.version = ?
+                    """,
+                    (self.version,)
+                ).fetchall()
+
+            connection.execute(
+                """
+                CREATE TEMP TABLE candidates AS
+                SELECT DISTINCT postings.submission AS submission
+                FROM probe CROSS JOIN postings ON postings.hash = probe.hash
+                """
+            )
+
+            # Cada hash de la consulta se busca por clave primaria en cada candidata,
+            # CROSS JOIN fija el orden para que SQLite no recorra todas las postings
+            return connection.execute(
+                """
+                SELECT submissions.id, submissions.name, submissions.size, counts.matches
+                FROM (
+                    SELECT candidates.submission AS submission, COUNT(*) AS matches
+                    FROM candidates CROSS JOIN query
+                    CROSS JOIN postings ON postings.hash = query.hash AND postings.submission = candidates.submission
+                    WHERE query.submissions > 0
+                    GROUP BY candidates.submission
+                ) AS counts
+                JOIN submissions ON submissions.id = counts.submission
+                WHERE submissions.version = ?
+                """,
+                (self.version,)
+            ).fetchall()
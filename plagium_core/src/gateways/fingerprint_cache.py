@@ -0,0 +1,115 @@
+import sqlite3
+from array import array
+from collections import OrderedDict
+from contextlib import closing
+from threading import Lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    digest TEXT NOT NULL,
+    version TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (digest, version)
+) WITHOUT ROWID;
+"""
+
+class FingerprintCache:
+    """
+    Content-addressed cache of fingerprints, with an in-memory LRU tier
+    bounded by bytes in front of an on-disk SQLite tier
+    """
+
+    def __init__(self, path: str, max_bytes: int, version: str):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version
+        self.memory: OrderedDict[str, bytes] = OrderedDict()
+        self.memory_bytes = 0
+        self.lock = Lock()
+
+        with closing(self.connect()) as connection:
+            connection.executescript(SCHEMA)
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open a new connection to the disk tier, one per operation so it can be
+        used from any thread
+        """
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    def remember(self, digest: str, data: bytes):
+        """
+        Put a packed fingerprint in the memory tier, evicting the least
+        recently used ones while the tier is over its size
+        """
+        if len(data) > self.max_bytes:
+            return
+
+        with self.lock:
+            previous = self.memory.pop(digest, None)
+            if previous is not None:
+                self.memory_bytes -= len(previous)
+
+            self.memory[digest] = data
+            self.memory_bytes += len(data)
+
+            while self.memory_bytes > self.max_bytes:
+                _, evicted = self.memory.popitem(last=False)
+                self.memory_bytes -= len(evicted)
+
+    def get(self, digests: list[str]) -> dict[str, set[int]]:
+        """
+        Look for the fingerprints of several files, first in memory, then on disk
+
+        Parameters:
+            digests (list[str]): Content digests of the files
+
+        Returns:
+            dict[str, set[int]]: Fingerprints found, by digest
+        """
+        found = {}
+        missing = []
+
+        with self.lock:
+            for digest in digests:
+                data = self.memory.get(digest)
+                if data is None:
+                    missing.append(digest)
+                else:
+                    self.memory.move_to_end(digest)
+                    found[digest] = data
+
+        if missing:
+            with closing(self.connect()) as connection:
+                for digest in missing:
+                    row = connection.execute(
+                        "SELECT data FROM fingerprints WHERE digest = ? AND version = ?",
+                        (digest, self.version)
+                    ).fetchone()
+
+                    if row is not None:
+                        found[digest] = row[0]
+                        self.remember(digest, row[0])
+
+        return {digest: set(array("Q", data)) for digest, data in found.items()}
+
+    def put(self, fingerprints: dict[str, set[int]]):
+        """
+        Store the fingerprints of several files in both tiers
+
+        Parameters:
+            fingerprints (dict[str, set[int]]): Fingerprints by content digest
+        """
+        packed = {digest: array("Q", sorted(fingerprint)).tobytes() for digest, fingerprint in fingerprints.items()}
+
+        with closing(self.connect()) as connection, connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO fingerprints (digest, version, data) VALUES (?, ?, ?)",
+                ((digest, self.version, data) for digest, data in packed.items())
+            )
+
+        for digest, data in packed.items():
+            self.remember(digest, data)
@@ -0,0 +1,33 @@
+from threading import Lock
+from src.entities.job import Job
+
+class JobStore:
+    """
+    Local in-memory store of the comparison jobs, keeping only the most
+    recent finished jobs
+    """
+
+    def __init__(self, max_finished: int):
+        self.max_finished = max_finished
+        self.jobs: dict[str, Job] = {}
+        self.lock = Lock()
+
+    def add(self, job: Job) -> Job:
+        """
+        Store a new job, forgetting the oldest finished jobs over the limit
+        """
+        with self.lock:
+            finished = sorted((stored for stored in self.jobs.values() if stored.done), key=lambda stored: stored.finished)
+            for stored in finished[:max(0, len(finished) - self.max_finished + 1)]:
+                del self.jobs[stored.id]
+
+            self.jobs[job.id] = job
+
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """
+        Get a job by its id
+        """
+        with self.lock:
+            return self.jobs.get(job_id)
\ No newline at end of file
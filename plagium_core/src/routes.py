@@ -1,39 +1,497 @@
-from concurrent.futures import ThreadPoolExecutor
-from flask import Blueprint, request, jsonify
-from src.use_case.parse_code import parseCode
-from src.use_case.compare_trees import compareTreesUseCase
+import json
+from hashlib import sha256
+from collections.abc import Callable, Iterable, Iterator
+from time import perf_counter, time
+from flask import Blueprint, Flask, Response, abort, current_app, request, jsonify, stream_with_context
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import BadRequest
+from src.use_case.compare_trees import ENGINE_VERSION
+from src.use_case.compare_files import compareFilesUseCase, iterCompareFiles
+from src.use_case.compare_matrix import compareMatrixUseCase
+from src.use_case.compare_lsh import compareLshUseCase
+from src.use_case.compare_tiered import compareTieredUseCase
+from src.use_case.compare_join import compareJoinUseCase
+from src.use_case.fingerprint_files import contentDigest, fingerprintFilesUseCase
+from src.use_case.filter_pairs import filterPairsUseCase
+from src.use_case.cluster_pairs import clusterPairsUseCase
+from src.use_case.encode_matrix import MATRIX_MIMETYPE, encodeMatrixUseCase
+from src.use_case.query_corpus import queryCorpusUseCase
+from src.gateways.corpus_index import CorpusIndex
+from src.gateways.fingerprint_cache import FingerprintCache
+from src.gateways.job_store import JobStore
+from src.workers import getExecutor
 from src.entities.file import File
+from src.entities.job import Job
 
 bp = Blueprint("main_v1", __name__, url_prefix="/v1.1")
 
-async def async_compare_trees(pair):
-    return await compareTreesUseCase(pair[0].tree, pair[1].tree)
+@bp.errorhandler(BadRequest)
+def badRequest(error: BadRequest):
+    return jsonify({"error": error.description}), 400
 
-@bp.route("/process", methods=["POST"])
-def process():
-    # Parsea el código de cada archivo y calcula su hash
-    files = []
+def getCorpusIndex(version: str) -> CorpusIndex:
+    """
+    Get the corpus index of the application for a version of the
+    fingerprints, opened on first use, see getEngine
+    """
+    indexes = current_app.extensions.setdefault("corpus_indexes", {})
+
+    if version not in indexes:
+        indexes[version] = CorpusIndex(current_app.config["CORPUS_PATH"], version)
+
+    return indexes[version]
+
+def getFingerprintCache(version: str) -> FingerprintCache:
+    """
+    Get the fingerprint cache of the application for a version of the
+    fingerprints, opened on first use, see getEngine
+    """
+    caches = current_app.extensions.setdefault("fingerprint_caches", {})
+
+    if version not in caches:
+        caches[version] = FingerprintCache(
+            current_app.config["CACHE_PATH"],
+            current_app.config["CACHE_MEMORY_BYTES"],
+            version
+        )
+
+    return caches[version]
+
+def getEngine(args: MultiDict) -> tuple[str, tuple[int, int] | None]:
+    """
+    Get the fingerprint engine chosen by the query parameters, "tree" for the
+    subtree hashes of the parse tree or "winnow" for the token winnowing
+
+    Returns:
+        tuple[str, tuple[int, int] | None]: Version of the fingerprints, that
+        only match those of the same version, and the kgram and window of the
+        winnowing, None for the tree engine
+
+    Raises:
+        BadRequest: When the kgram or the window of the winnowing is below 1
+    """
+    if args.get("engine", current_app.config["COMPARE_ENGINE"]) == "winnow":
+        kgram = args.get("winnow_kgram", current_app.config["WINNOW_KGRAM"], type=int)
+        window = args.get("winnow_window", current_app.config["WINNOW_WINDOW"], type=int)
+
+        if kgram < 1 or window < 1:
+            abort(400, "winnow_kgram and winnow_window must be at least 1")
+
+        return f"{ENGINE_VERSION}-winnow-{kgram}-{window}", (kgram, window)
+
+    # Las huellas de cada backend de parseo se guardan por separado
+    backend = current_app.config["PARSE_BACKEND"]
+    return ENGINE_VERSION if backend == "antlr" else f"{ENGINE_VERSION}-{backend}", None
+
+def getPermutations(args: MultiDict, name: str, default: int, maximum: int | None = None) -> int:
+    """
+    Get the length of the MinHash signatures asked by a query parameter
+
+    Raises:
+        BadRequest: When the length is below 1 or above maximum
+    """
+    permutations = args.get(name, default, type=int)
+
+    if permutations < 1:
+        abort(400, f"{name} must be at least 1")
+
+    # Las firmas ocupan memoria y tiempo proporcionales a su longitud
+    if maximum is not None and permutations > maximum:
+        abort(400, f"{name} must be at most {maximum}")
+
+    return permutations
+
+def getJobStore() -> JobStore:
+    """
+    Get the job store of the application, created on first use
+    """
+    if "job_store" not in current_app.extensions:
+        current_app.extensions["job_store"] = JobStore(current_app.config["JOBS_KEPT"])
+
+    return current_app.extensions["job_store"]
+
+def getMaxErrors() -> int | None:
+    """
+    Get the syntax errors allowed for each file by the configured error policy
+    """
+    policy = current_app.config["PARSE_ERROR_POLICY"]
+
+    if policy == "bail":
+        return 0
+
+    if policy == "cap":
+        return current_app.config["PARSE_MAX_ERRORS"]
+
+    return None
+
+def readUploads() -> tuple[dict[str, tuple[str, str]], list[File]]:
+    """
+    Read the uploaded files of the request, files with the same content are
+    only kept once
+
+    Returns:
+        tuple[dict[str, tuple[str, str]], list[File]]: Name and code of each file,
+        by content digest, and the files that are not UTF-8 text, with "status"
+        set to "decode_error" in their metrics
+    """
+    # Lee el código de cada archivo y descarta los duplicados por su hash
+    uploads = {}
+    undecodable = []
     for file in request.files.values():
-        code = file.read().decode("utf-8")
-        files.append(File(file.filename, parseCode(code), hash(code)))
+        data = file.read()
+
+        try:
+            code = data.decode("utf-8")
+        except UnicodeDecodeError as error:
+            undecodable.append(File(file.filename, None, sha256(data).hexdigest(), None, {"status": "decode_error", "error": str(error)}))
+            continue
+
+        uploads.setdefault(contentDigest(code), (file.filename, code))
+
+    return uploads, undecodable
+
+def readFiles(uploads: tuple[dict[str, tuple[str, str]], list[File]] | None = None, on_parsed: Callable[[int], None] | None = None, args: MultiDict | None = None) -> tuple[list[File], list[File]]:
+    """
+    Parse and fingerprint the uploaded files, see readUploads
+
+    Parameters:
+        uploads (tuple[dict[str, tuple[str, str]], list[File]] | None): Files already read, the request files when None
+        on_parsed (Callable[[int], None] | None): Called with the number of files done, to report progress
+        args (MultiDict | None): Query parameters choosing the engine, see getEngine, those of the request when None
+
+    Returns:
+        tuple[list[File], list[File]]: Files fingerprinted and files that could not
+        be decoded or parsed, the latter are left out of every comparison
+    """
+    uploads, undecodable = readUploads() if uploads is None else uploads
+
+    version, winnow = getEngine(request.args if args is None else args)
+
+    # Parsea y calcula los hashes de subárboles de cada archivo en paralelo
+    results = fingerprintFilesUseCase(
+        [code for _, code in uploads.values()],
+        current_app.config["EXECUTOR"],
+        current_app.config["WORKERS"],
+        getFingerprintCache(version),
+        on_parsed,
+        getMaxErrors(),
+        current_app.config["PARSE_TIMEOUT"] or None,
+        current_app.config["PARSE_MAX_RSS"] or None,
+        current_app.config["FINGERPRINT_MODE"] == "stream",
+        current_app.config["PARSE_BACKEND"],
+        winnow
+    )
+
+    files = [
+        File(name, None, digest, fingerprint, metrics)
+        for (digest, (name, _)), (fingerprint, metrics) in zip(uploads.items(), results)
+    ]
+
+    return [file for file in files if file.fingerprint is not None], [file for file in files if file.fingerprint is None] + undecodable
+
+def describeFiles(files: list[File]) -> list[dict]:
+    """
+    Get the name and the parse metrics, or the errors, of each file for the report
+    """
+    return [{"name": file.name, **file.metrics} for file in files]
+
+def scorePairs(fingerprints: list[set[int]], args: MultiDict, streaming: bool = False, on_scored: Callable[[], None] | None = None, stages: dict | None = None) -> Iterable[tuple[int, int, float]]:
+    """
+    Compare the files with the strategy and engine chosen by the query
+    parameters, keeping only the pairs asked by min_similarity and top_k_per_file
+
+    When a filter is given the pairs are scored as a stream even if streaming
+    is False, so only the kept pairs are ever held, and they are returned
+    sorted by indexes.
+
+    Parameters:
+        fingerprints (list[set[int]]): Subtree hashes of each file
+        args (MultiDict): Query parameters of the request
+        streaming (bool): Yield the pairs as soon as they are scored, in any order
+        on_scored (Callable[[], None] | None): Called for every scored pair, kept or not, to report progress
+        stages (dict | None): Filled with the pairs eliminated by each stage of the "tiered" mode
+
+    Returns:
+        Iterable[tuple[int, int, float]]: Indexes and similarity of each kept pair
+
+    Raises:
+        BadRequest: When top_k_per_file is below 1
+    """
+    top_k_per_file = args.get("top_k_per_file", None, type=int)
+
+    if top_k_per_file is not None and top_k_per_file < 1:
+        abort(400, "top_k_per_file must be at least 1")
+
+    # Con filtros, los pares llegan a los montículos sin guardarlos todos antes
+    filtered = "min_similarity" in args or top_k_per_file is not None
+    scored = comparePairs(fingerprints, args, streaming or filtered, stages)
+
+    if on_scored is not None:
+        scored = countPairs(scored, on_scored)
+
+    kept = filterPairsUseCase(scored, len(fingerprints), args.get("min_similarity", 0, type=float), top_k_per_file)
+
+    # Solo los pares que quedan se ordenan para el informe
+    if filtered and not streaming and top_k_per_file is None:
+        return sorted(kept)
+
+    return kept
+
+def countPairs(scored: Iterable[tuple[int, int, float]], on_scored: Callable[[], None]) -> Iterator[tuple[int, int, float]]:
+    """
+    Call on_scored for every pair going through, see scorePairs
+    """
+    for pair in scored:
+        on_scored()
+        yield pair
+
+def comparePairs(fingerprints: list[set[int]], args: MultiDict, streaming: bool = False, stages: dict | None = None) -> Iterable[tuple[int, int, float]]:
+    """
+    Compare the files with the strategy and engine chosen by the query parameters, see scorePairs
+    """
+    mode = args.get("mode", current_app.config["COMPARE_MODE"])
+    min_similarity = args.get("min_similarity", current_app.config["JOIN_THRESHOLD"], type=float)
+
+    if mode == "join" and min_similarity > 0:
+        return compareJoinUseCase(fingerprints, min_similarity)
 
-    files = list(set(files))
+    if mode == "tiered":
+        return compareTieredUseCase(
+            fingerprints,
+            args.get("tiered_cutoff", current_app.config["TIERED_CUTOFF"], type=float),
+            args.get("min_similarity", 0, type=float),
+            getPermutations(args, "tiered_permutations", current_app.config["TIERED_PERMUTATIONS"], current_app.config["MAX_PERMUTATIONS"]),
+            stages
+        )
 
-    pairs = [(files[i], files[j]) for i in range(len(files)) for j in range(i + 1, len(files))]
+    if mode == "lsh":
+        return compareLshUseCase(
+            fingerprints,
+            args.get("lsh_threshold", current_app.config["LSH_THRESHOLD"], type=float),
+            getPermutations(args, "lsh_permutations", current_app.config["LSH_PERMUTATIONS"], current_app.config["MAX_PERMUTATIONS"]),
+            args.get("lsh_bands", None, type=int)
+        )
 
-    # Create a ThreadPoolExecutor
-    with ThreadPoolExecutor(4) as executor:
-        # Use the executor to run compareTreesUseCase for each pair in pairs
-        similarities = list(executor.map(lambda p: compareTreesUseCase(p[0].tree, p[1].tree), pairs))
+    if mode == "matrix":
+        return compareMatrixUseCase(fingerprints, current_app.config["MATRIX_BLOCK_PAIRS"])
+
+    if streaming:
+        return iterCompareFiles(
+            fingerprints,
+            current_app.config["EXECUTOR"],
+            current_app.config["WORKERS"],
+            current_app.config["CHUNKS_PER_WORKER"]
+        )
+
+    similarities = compareFilesUseCase(
+        fingerprints,
+        current_app.config["EXECUTOR"],
+        current_app.config["WORKERS"],
+        current_app.config["CHUNKS_PER_WORKER"]
+    )
+
+    pairs = ((i, j) for i in range(len(fingerprints)) for j in range(i + 1, len(fingerprints)))
+    return ((i, j, similarity) for (i, j), similarity in zip(pairs, similarities))
+
+@bp.route("/ready", methods=["GET"])
+def ready():
+    # El servicio está listo cuando termina de precalentar el parser
+    warm_up = current_app.extensions["warm_up"]
+    status = 200 if warm_up["status"] == "ready" else 503
+
+    return jsonify({"ready": status == 200, "warm_up": warm_up}), status
+
+@bp.route("/process", methods=["POST"])
+def process():
+    files, failed = readFiles()
+
+    # Compara los pares con la estrategia y el motor configurados
+    stages = {}
+    scored = scorePairs([file.fingerprint for file in files], request.args, stages=stages)
+
+    # Matriz binaria compacta si el cliente la prefiere a JSON
+    if request.accept_mimetypes.best_match(["application/json", MATRIX_MIMETYPE]) == MATRIX_MIMETYPE:
+        dtype = "float16" if request.args.get("dtype") == "float16" else "float32"
+        return Response(encodeMatrixUseCase([file.name for file in files], scored, dtype), mimetype=MATRIX_MIMETYPE)
 
     # Prepara y devuelve el informe de similitudes
     report = [
         {
-            "file1": pair[0].name,
-            "file2": pair[1].name,
+            "file1": files[i].name,
+            "file2": files[j].name,
             "similarity": similarity
         }
-        for pair, similarity in zip(pairs, similarities)
+        for i, j, similarity in scored
+    ]
+
+    response = {"report": report, "files": describeFiles(files), "errors": describeFiles(failed)}
+    if stages:
+        response["stages"] = stages
+
+    return jsonify(response)
+
+@bp.route("/process/stream", methods=["POST"])
+def processStream():
+    started = perf_counter()
+    files, failed = readFiles()
+    stages = {}
+    scored = scorePairs([file.fingerprint for file in files], request.args, streaming=True, stages=stages)
+
+    def generate():
+        # Una línea JSON por cada par en cuanto se termina de comparar
+        pairs = 0
+        for i, j, similarity in scored:
+            pairs += 1
+            yield json.dumps({"file1": files[i].name, "file2": files[j].name, "similarity": similarity}) + "\n"
+
+        summary = {"files": len(files), "pairs": pairs, "errors": describeFiles(failed), "seconds": perf_counter() - started}
+        if stages:
+            summary["stages"] = stages
+        yield json.dumps({"summary": summary}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@bp.route("/clusters", methods=["POST"])
+def clusters():
+    files, failed = readFiles()
+
+    # Solo los pares por encima del umbral unen archivos en un grupo
+    args = request.args.copy()
+    args.setdefault("min_similarity", str(current_app.config["CLUSTER_THRESHOLD"]))
+    scored = scorePairs([file.fingerprint for file in files], args, streaming=True)
+
+    report = [
+        {
+            "files": [files[member].name for member in members],
+            "size": len(members),
+            "representative": {
+                "file1": files[i].name,
+                "file2": files[j].name,
+                "similarity": similarity
+            }
+        }
+        for members, (i, j, similarity) in clusterPairsUseCase(scored, len(files))
+    ]
+
+    return jsonify({"threshold": args.get("min_similarity", type=float), "clusters": report, "errors": describeFiles(failed)})
+
+@bp.route("/corpus", methods=["POST"])
+def addToCorpus():
+    # Guarda los hashes de subárboles de cada archivo en el índice
+    index = getCorpusIndex(getEngine(request.args)[0])
+    files, failed = readFiles()
+    submissions = [
+        {"id": index.add(file.name, file.hash, file.fingerprint), "name": file.name}
+        for file in files
     ]
 
-    return jsonify({"report": report})
+    return jsonify({"submissions": submissions, "total": index.count(), "errors": describeFiles(failed)})
+
+@bp.route("/corpus/query", methods=["POST"])
+def queryCorpus():
+    # Solo se comparan las huellas generadas por el mismo motor
+    index = getCorpusIndex(getEngine(request.args)[0])
+    limit = request.args.get("limit", 10, type=int)
+    min_similarity = request.args.get("min_similarity", 0, type=float)
+    files, failed = readFiles()
+
+    # Compara cada archivo contra todo el corpus almacenado
+    report = [
+        {
+            "file": file.name,
+            "matches": [
+                {"id": submission, "name": name, "similarity": similarity}
+                for submission, name, similarity in queryCorpusUseCase(index, file.fingerprint, limit, min_similarity, current_app.config["CORPUS_MAX_FREQUENCY"])
+            ]
+        }
+        for file in files
+    ]
+
+    return jsonify({"report": report, "errors": describeFiles(failed)})
+
+def runJob(app: Flask, job: Job, uploads: tuple[dict[str, tuple[str, str]], list[File]], args: MultiDict):
+    """
+    Run the parse, fingerprint and compare pipeline of a job in the background
+    """
+    with app.app_context():
+        try:
+            job.status = "parsing"
+
+            def onParsed(count: int):
+                job.files_parsed += count
+
+            files, failed = readFiles(uploads, onParsed, args)
+
+            job.status = "comparing"
+            if args.get("mode", current_app.config["COMPARE_MODE"]) not in ("lsh", "join", "tiered"):
+                job.pairs_total = len(files) * (len(files) - 1) // 2
+
+            def onScored():
+                job.pairs_scored += 1
+
+            stages = {}
+            scored = list(scorePairs([file.fingerprint for file in files], args, True, onScored, stages))
+
+            job.report = [
+                {
+                    "file1": files[i].name,
+                    "file2": files[j].name,
+                    "similarity": similarity
+                }
+                for i, j, similarity in sorted(scored)
+            ]
+            job.files = describeFiles(files)
+            job.errors = describeFiles(failed)
+            job.stages = stages or None
+
+            # La hora de fin va antes del estado, JobStore ordena por ella los trabajos terminados
+            job.finished = time()
+            job.status = "done"
+        except Exception as error:
+            job.error = error.description if isinstance(error, BadRequest) else str(error)
+            job.finished = time()
+            job.status = "failed"
+
+@bp.route("/jobs", methods=["POST"])
+def createJob():
+    # Rechaza los parámetros inválidos antes de aceptar el trabajo
+    getEngine(request.args)
+
+    # Lee los archivos y deja el resto del proceso en segundo plano
+    uploads = readUploads()
+    job = getJobStore().add(Job(len(uploads[0])))
+    response = jsonify({"id": job.id, "status": job.status})
+
+    executor = getExecutor("thread", current_app.config["JOB_WORKERS"], "jobs")
+    executor.submit(runJob, current_app._get_current_object(), job, uploads, request.args.copy())
+
+    return response, 202
+
+@bp.route("/jobs/<job_id>", methods=["GET"])
+def getJob(job_id: str):
+    job = getJobStore().get(job_id)
+
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    response = {
+        "id": job.id,
+        "status": job.status,
+        "progress": {
+            "files_parsed": job.files_parsed,
+            "files_total": job.files_total,
+            "pairs_scored": job.pairs_scored,
+            "pairs_total": job.pairs_total
+        }
+    }
+
+    if job.status == "done":
+        response["report"] = job.report
+        response["files"] = job.files
+        response["errors"] = job.errors
+        if job.stages:
+            response["stages"] = job.stages
+    elif job.status == "failed":
+        response["error"] = job.error
+
+    return jsonify(response)
\ No newline at end of file
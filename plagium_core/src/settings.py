@@ -1,7 +1,82 @@
+from os import cpu_count, environ
 from os.path import join, dirname
 from dotenv import dotenv_values
 
 src_dir:str = dirname(__file__)
 root_dir:str = dirname(src_dir)
 
-config = dotenv_values(join(root_dir, '.env'))
\ No newline at end of file
+config = dotenv_values(join(root_dir, '.env'))
+
+def getSetting(name: str, default: str) -> str:
+    """
+    Read a setting from the environment, then from the .env file
+
+    Parameters:
+        name (str): Setting name
+        default (str): Value used when the setting is not defined
+
+    Returns:
+        str: Setting value
+    """
+    return environ.get(name) or config.get(name) or default
+
+# Motor de comparación: "process", "thread" o "serial"
+EXECUTOR:str = getSetting("PLAGIUM_EXECUTOR", "process")
+WORKERS:int = int(getSetting("PLAGIUM_WORKERS", str(cpu_count() or 1)))
+CHUNKS_PER_WORKER:int = int(getSetting("PLAGIUM_CHUNKS_PER_WORKER", "4"))
+
+# Estrategia de comparación: "pairs", "matrix", "lsh", "join" o "tiered"
+COMPARE_MODE:str = getSetting("PLAGIUM_COMPARE_MODE", "pairs")
+MATRIX_BLOCK_PAIRS:int = int(getSetting("PLAGIUM_MATRIX_BLOCK_PAIRS", str(1 << 20)))
+
+# Motor de huellas: "tree" (hashes de subárboles) o "winnow" (winnowing de tokens)
+COMPARE_ENGINE:str = getSetting("PLAGIUM_COMPARE_ENGINE", "tree")
+WINNOW_KGRAM:int = int(getSetting("PLAGIUM_WINNOW_KGRAM", "5"))
+WINNOW_WINDOW:int = int(getSetting("PLAGIUM_WINNOW_WINDOW", "4"))
+
+# Parámetros por defecto del índice MinHash/LSH y longitud máxima de las
+# firmas MinHash que puede pedir una consulta
+LSH_THRESHOLD:float = float(getSetting("PLAGIUM_LSH_THRESHOLD", "50"))
+LSH_PERMUTATIONS:int = int(getSetting("PLAGIUM_LSH_PERMUTATIONS", "128"))
+MAX_PERMUTATIONS:int = int(getSetting("PLAGIUM_MAX_PERMUTATIONS", "1024"))
+
+# Similitud mínima por defecto del modo "join"
+JOIN_THRESHOLD:float = float(getSetting("PLAGIUM_JOIN_THRESHOLD", "50"))
+
+# Corte de la primera etapa del modo "tiered" y longitud de sus firmas MinHash
+TIERED_CUTOFF:float = float(getSetting("PLAGIUM_TIERED_CUTOFF", "30"))
+TIERED_PERMUTATIONS:int = int(getSetting("PLAGIUM_TIERED_PERMUTATIONS", "128"))
+
+# Índice invertido persistente de las entregas anteriores y fracción de ellas
+# por encima de la que un hash es demasiado común para buscar candidatas
+CORPUS_PATH:str = getSetting("PLAGIUM_CORPUS_PATH", join(root_dir, "corpus.sqlite3"))
+CORPUS_MAX_FREQUENCY:float = float(getSetting("PLAGIUM_CORPUS_MAX_FREQUENCY", "0.5"))
+
+# Caché de huellas: memoria limitada por bytes y disco
+CACHE_PATH:str = getSetting("PLAGIUM_CACHE_PATH", join(root_dir, "fingerprints.sqlite3"))
+CACHE_MEMORY_BYTES:int = int(getSetting("PLAGIUM_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+
+# Trabajos asíncronos: hilos que los ejecutan y trabajos terminados que se conservan
+JOB_WORKERS:int = int(getSetting("PLAGIUM_JOB_WORKERS", "2"))
+JOBS_KEPT:int = int(getSetting("PLAGIUM_JOBS_KEPT", "100"))
+
+# Similitud mínima para unir dos archivos en un grupo sospechoso
+CLUSTER_THRESHOLD:float = float(getSetting("PLAGIUM_CLUSTER_THRESHOLD", "50"))
+
+# Política ante errores de sintaxis: "recover", "bail" o "cap" (hasta PARSE_MAX_ERRORS)
+PARSE_ERROR_POLICY:str = getSetting("PLAGIUM_PARSE_ERROR_POLICY", "recover")
+PARSE_MAX_ERRORS:int = int(getSetting("PLAGIUM_PARSE_MAX_ERRORS", "10"))
+
+# Límites de cada archivo en los procesos de parseo, 0 para no limitar
+PARSE_TIMEOUT:float = float(getSetting("PLAGIUM_PARSE_TIMEOUT", "30"))
+PARSE_MAX_RSS:int = int(getSetting("PLAGIUM_PARSE_MAX_RSS_MB", "1024")) * 1024 * 1024
+
+# Backend de parseo: "antlr" (gramática Python3) o "ast" (parser de CPython)
+PARSE_BACKEND:str = getSetting("PLAGIUM_PARSE_BACKEND", "antlr")
+
+# Huellas: "tree" desde el árbol compacto, "stream" mientras se parsea sin construir el árbol
+FINGERPRINT_MODE:str = getSetting("PLAGIUM_FINGERPRINT_MODE", "tree")
+
+# Precalentamiento del parser al arrancar con los archivos de ejemplo
+WARM_UP:bool = getSetting("PLAGIUM_WARM_UP", "true").lower() in ("1", "true", "yes")
+WARM_UP_FILES:str = getSetting("PLAGIUM_WARM_UP_FILES", join(root_dir, "test", "example*.py"))
\ No newline at end of file
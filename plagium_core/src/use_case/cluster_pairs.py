@@ -0,0 +1,70 @@
+from collections.abc import Iterable
+
+class UnionFind:
+    """
+    Disjoint sets of files with path halving and union by size
+    """
+
+    def __init__(self, size: int):
+        self.parents = list(range(size))
+        self.sizes = [1] * size
+
+    def find(self, item: int) -> int:
+        """
+        Get the root of the set of an item
+        """
+        while self.parents[item] != item:
+            self.parents[item] = self.parents[self.parents[item]]
+            item = self.parents[item]
+
+        return item
+
+    def union(self, first: int, second: int) -> int:
+        """
+        Join the sets of two items and return the root of the joined set
+        """
+        first, second = self.find(first), self.find(second)
+
+        if first == second:
+            return first
+
+        if self.sizes[first] < self.sizes[second]:
+            first, second = second, first
+
+        self.parents[second] = first
+        self.sizes[first] += self.sizes[second]
+        return first
+
+def clusterPairsUseCase(scored: Iterable[tuple[int, int, float]], files_count: int) -> list[tuple[list[int], tuple[int, int, float]]]:
+    """
+    Group the files into single-linkage clusters as the pairs are scored
+
+    Every pair received links its two files, so the pairs should already be
+    filtered by the similarity threshold. Only the strongest pair of each
+    cluster is kept as its representative, so memory grows with the number
+    of files and not with the number of pairs.
+
+    Parameters:
+        scored (Iterable[tuple[int, int, float]]): Indexes and similarity of each pair above the threshold
+        files_count (int): Number of files compared
+
+    Returns:
+        list[tuple[list[int], tuple[int, int, float]]]: Files and representative
+        pair of each cluster with more than one file, biggest clusters first
+    """
+    sets = UnionFind(files_count)
+    representatives = {}
+
+    for pair in scored:
+        first, second = sets.find(pair[0]), sets.find(pair[1])
+        candidates = [pair, representatives.pop(first, None), representatives.pop(second, None)]
+
+        root = sets.union(first, second)
+        representatives[root] = max((candidate for candidate in candidates if candidate is not None), key=lambda candidate: candidate[2])
+
+    members = {}
+    for file in range(files_count):
+        members.setdefault(sets.find(file), []).append(file)
+
+    clusters = [(members[root], representative) for root, representative in representatives.items()]
+    return sorted(clusters, key=lambda cluster: (-len(cluster[0]), cluster[0][0]))
\ No newline at end of file
@@ -0,0 +1,124 @@
+from array import array
+from itertools import islice
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, wait
+from math import ceil, sqrt
+from src.use_case.compare_trees import compareTreesUseCase
+from src.workers import getExecutor
+
+def packFingerprint(fingerprint: set[int]) -> array:
+    """
+    Pack a fingerprint into a compact array of unsigned 64-bit integers
+
+    Parameters:
+        fingerprint (set[int]): Subtree hashes of a file
+
+    Returns:
+        array: Sorted hashes, cheap to pickle and send to worker processes
+    """
+    return array("Q", sorted(fingerprint))
+
+def compareBlock(rows: list[tuple[int, object]], columns: list[tuple[int, object]]) -> list[tuple[int, int, float]]:
+    """
+    Compare every file of a block of rows against every later file of a block of columns
+
+    Parameters:
+        rows (list[tuple[int, object]]): Indexes and fingerprints of the row files
+        columns (list[tuple[int, object]]): Indexes and fingerprints of the column files
+
+    Returns:
+        list[tuple[int, int, float]]: Indexes of each pair and their similarity
+    """
+    column_sets = [(j, set(fingerprint)) for j, fingerprint in columns]
+    results = []
+
+    for i, fingerprint in rows:
+        first = set(fingerprint)
+
+        for j, second in column_sets:
+            if j > i:
+                results.append((i, j, compareTreesUseCase(first, second)))
+
+    return results
+
+def iterCompareFiles(fingerprints: list[set[int]], executor: str, workers: int, chunks_per_worker: int = 4) -> Iterator[tuple[int, int, float]]:
+    """
+    Compare every unique pair of files, yielding each batch as soon as it is done
+
+    The upper triangle of the pair matrix is split into blocks and each block
+    is sent as one batch to the executor, together with only the fingerprints
+    it needs. At most two batches per worker are in flight, the next one is
+    only sent when a finished batch is taken, and each batch is dropped once
+    its pairs are yielded, so memory does not grow with the number of pairs.
+
+    Parameters:
+        fingerprints (list[set[int]]): Subtree hashes of each file
+        executor (str): "process", "thread" or "serial"
+        workers (int): Number of workers to use
+        chunks_per_worker (int): Batches sent to each worker
+
+    Returns:
+        Iterator[tuple[int, int, float]]: Indexes and similarity of each pair, in completion order
+    """
+    n = len(fingerprints)
+    pool = getExecutor(executor, workers)
+
+    if pool is None or n < 3:
+        for i in range(n):
+            for j in range(i + 1, n):
+                yield i, j, compareTreesUseCase(fingerprints[i], fingerprints[j])
+        return
+
+    # Los procesos reciben los hashes empaquetados en lugar de conjuntos
+    if executor == "process":
+        fingerprints = [packFingerprint(fingerprint) for fingerprint in fingerprints]
+
+    # b bloques generan b * (b + 1) / 2 lotes del triángulo superior
+    target_chunks = workers * chunks_per_worker
+    blocks_count = min(n, ceil((sqrt(8 * target_chunks + 1) - 1) / 2))
+    block_size = ceil(n / blocks_count)
+    indexed = list(enumerate(fingerprints))
+    blocks = [indexed[start:start + block_size] for start in range(0, n, block_size)]
+
+    tasks = ((blocks[a], blocks[b]) for a in range(len(blocks)) for b in range(a, len(blocks)))
+
+    # Ventana acotada de lotes en curso: solo se envía otro cuando el
+    # consumidor recoge uno, así un cliente lento no acumula resultados
+    in_flight = set()
+    for rows, columns in islice(tasks, 2 * workers):
+        in_flight.add(pool.submit(compareBlock, rows, columns))
+
+    try:
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+
+            for rows, columns in islice(tasks, len(done)):
+                in_flight.add(pool.submit(compareBlock, rows, columns))
+
+            while done:
+                yield from done.pop().result()
+    finally:
+        # Si el consumidor se detiene, no se calculan los lotes pendientes
+        for future in in_flight:
+            future.cancel()
+
+def compareFilesUseCase(fingerprints: list[set[int]], executor: str, workers: int, chunks_per_worker: int = 4) -> list[float]:
+    """
+    Compare every unique pair of files, see iterCompareFiles
+
+    Parameters:
+        fingerprints (list[set[int]]): Subtree hashes of each file
+        executor (str): "process", "thread" or "serial"
+        workers (int): Number of workers to use
+        chunks_per_worker (int): Batches sent to each worker
+
+    Returns:
+        list[float]: Similarity of each pair (i, j) with i < j, in row-major order
+    """
+    n = len(fingerprints)
+    similarities = {}
+
+    for i, j, similarity in iterCompareFiles(fingerprints, executor, workers, chunks_per_worker):
+        similarities[(i, j)] = similarity
+
+    return [similarities[(i, j)] for i in range(n) for j in range(i + 1, n)]
@@ -0,0 +1,83 @@
+from collections import Counter
+from math import ceil
+from src.use_case.compare_trees import compareTreesUseCase
+
+# Tolerancia para que los filtros nunca descarten un par por redondeo
+EPSILON = 1e-9
+
+def orderTokens(fingerprints: list[set[int]]) -> list[list[int]]:
+    """
+    Rewrite each fingerprint as a list of ranks in a global order of the hashes
+
+    The least frequent hashes come first, so prefixes are made of rare hashes
+    and share few posting lists.
+
+    Parameters:
+        fingerprints (list[set[int]]): Subtree hashes of each file
+
+    Returns:
+        list[list[int]]: Sorted ranks of the hashes of each file
+    """
+    frequencies = Counter(hash_value for fingerprint in fingerprints for hash_value in fingerprint)
+    ranks = {hash_value: rank for rank, hash_value in enumerate(sorted(frequencies, key=lambda h: (frequencies[h], h)))}
+
+    return [sorted(ranks[hash_value] for hash_value in fingerprint) for fingerprint in fingerprints]
+
+def compareJoinUseCase(fingerprints: list[set[int]], threshold: float) -> list[tuple[int, int, float]]:
+    """
+    Find every pair of files with a similarity of at least the threshold
+
+    Follows the PPJoin similarity join: files are processed by increasing
+    size, only the prefix of each ordered fingerprint is indexed and probed,
+    and candidates are dropped by size and positional bounds when they cannot
+    reach the threshold. Surviving candidates are scored exactly with
+    compareTreesUseCase, so the result is the same as comparing every pair
+    and keeping the ones above the threshold.
+
+    Parameters:
+        fingerprints (list[set[int]]): Subtree hashes of each file
+        threshold (float): Minimum percentage of similarity, greater than 0
+
+    Returns:
+        list[tuple[int, int, float]]: Indexes and similarity of each pair above the threshold, sorted
+    """
+    t = threshold / 100
+    records = orderTokens(fingerprints)
+    order = sorted((i for i in range(len(records)) if records[i]), key=lambda i: len(records[i]))
+
+    index = {}
+    results = []
+
+    for x in order:
+        tokens = records[x]
+        size = len(tokens)
+        prefix = size - ceil(t * size - EPSILON) + 1
+        min_size = t * size - EPSILON
+        overlaps = {}
+
+        for i, token in enumerate(tokens[:prefix]):
+            for y, j in index.get(token, ()):
+                other_size = len(records[y])
+                overlap = overlaps.get(y, 0)
+
+                if other_size < min_size or overlap < 0:
+                    continue
+
+                # Filtro posicional: cota superior de la intersección
+                required = ceil(t / (1 + t) * (size + other_size) - EPSILON)
+                if overlap + 1 + min(size - i - 1, other_size - j - 1) >= required:
+                    overlaps[y] = overlap + 1
+                else:
+                    overlaps[y] = -1
+
+            index.setdefault(token, []).append((x, i))
+
+        for y, overlap in overlaps.items():
+            if overlap <= 0:
+                continue
+
+            similarity = compareTreesUseCase(fingerprints[x], fingerprints[y])
+            if similarity >= threshold:
+                results.append((min(x, y), max(x, y), similarity))
+
+    return sorted(results)
@@ -0,0 +1,120 @@
+import numpy as np
+from src.use_case.compare_trees import compareTreesUseCase
+
+# Valores de 64 bits que se mezclan a la vez al calcular una firma
+SIGNATURE_CHUNK_VALUES = 1 << 20
+
+def mixHashes(values: np.ndarray) -> np.ndarray:
+    """
+    Scramble 64-bit values with the splitmix64 finalizer
+
+    Parameters:
+        values (np.ndarray): Unsigned 64-bit values
+
+    Returns:
+        np.ndarray: Scrambled values, same shape
+    """
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xbf58476d1ce4e5b9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94d049bb133111eb)
+    return values ^ (values >> np.uint64(31))
+
+def minhashSignatures(fingerprints: list[set[int]], permutations: int, seed: int = 0) -> np.ndarray:
+    """
+    Compute the MinHash signature of each file from its subtree hashes
+
+    The hashes of each file are mixed in chunks, so the temporary matrix never
+    holds more than SIGNATURE_CHUNK_VALUES values whatever the file size.
+
+    Parameters:
+        fingerprints (list[set[int]]): Subtree hashes of each file
+        permutations (int): Number of hash functions of the signature
+        seed (int): Seed of the hash functions
+
+    Returns:
+        np.ndarray: Matrix of files × permutations minimum hashes
+    """
+    signatures = np.full((len(fingerprints), permutations), np.iinfo(np.uint64).max, dtype=np.uint64)
+
+    with np.errstate(over="ignore"):
+        keys = mixHashes(np.arange(permutations, dtype=np.uint64) + np.uint64(seed))
+        chunk = max(1, SIGNATURE_CHUNK_VALUES // permutations)
+
+        for i, fingerprint in enumerate(fingerprints):
+            hashes = np.fromiter(fingerprint, dtype=np.uint64, count=len(fingerprint))
+
+            for start in range(0, len(hashes), chunk):
+                mixed = mixHashes(hashes[start:start + chunk, None] ^ keys[None, :]).min(axis=0)
+                np.minimum(signatures[i], mixed, out=signatures[i])
+
+    return signatures
+
+def chooseBands(permutations: int, threshold: float) -> int:
+    """
+    Choose the number of LSH bands whose detection curve is centered on the threshold
+
+    With b bands of r rows, a pair of similarity s becomes a candidate with
+    probability 1 - (1 - s^r)^b, which rises around s = (1 / b)^(1 / r).
+
+    Parameters:
+        permutations (int): Length of the signatures
+        threshold (float): Similarity, between 0 and 1, that should become a candidate
+
+    Returns:
+        int: Number of bands, a divisor of the number of permutations
+    """
+    small = [b for b in range(1, int(permutations ** 0.5) + 1) if permutations % b == 0]
+    divisors = sorted(set(small + [permutations // b for b in small]))
+    return min(divisors, key=lambda b: abs((1 / b) ** (b / permutations) - threshold))
+
+def lshCandidates(signatures: np.ndarray, bands: int) -> set[tuple[int, int]]:
+    """
+    Find the pairs of files that share at least one band of their signatures
+
+    Parameters:
+        signatures (np.ndarray): MinHash signatures, see minhashSignatures
+        bands (int): Number of bands, must divide the signature length
+
+    Returns:
+        set[tuple[int, int]]: Candidate pairs (i, j) with i < j
+    """
+    rows = signatures.shape[1] // bands
+    candidates = set()
+
+    for band in range(bands):
+        buckets = {}
+        for i, key in enumerate(signatures[:, band * rows:(band + 1) * rows]):
+            buckets.setdefault(key.tobytes(), []).append(i)
+
+        for members in buckets.values():
+            for a in range(len(members)):
+                for b in range(a + 1, len(members)):
+                    candidates.add((members[a], members[b]))
+
+    return candidates
+
+def compareLshUseCase(fingerprints: list[set[int]], threshold: float, permutations: int = 128, bands: int | None = None) -> list[tuple[int, int, float]]:
+    """
+    Compare only the pairs of files likely to be above a similarity threshold
+
+    Candidate pairs come from a MinHash/LSH banding index and are then scored
+    exactly with compareTreesUseCase. More permutations or more bands raise
+    the recall at the cost of speed.
+
+    Parameters:
+        fingerprints (list[set[int]]): Subtree hashes of each file
+        threshold (float): Percentage of similarity the candidates should reach
+        permutations (int): Length of the MinHash signatures
+        bands (int | None): Number of LSH bands, chosen from the threshold when None
+
+    Returns:
+        list[tuple[int, int, float]]: Indexes and similarity of each candidate pair, sorted
+    """
+    if bands is None or bands < 1 or permutations % bands != 0:
+        bands = chooseBands(permutations, threshold / 100)
+
+    signatures = minhashSignatures(fingerprints, permutations)
+    candidates = sorted(lshCandidates(signatures, bands))
+
+    return [(i, j, compareTreesUseCase(fingerprints[i], fingerprints[j])) for i, j in candidates]
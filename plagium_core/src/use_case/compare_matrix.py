@@ -0,0 +1,86 @@
+from collections.abc import Iterator
+import numpy as np
+from scipy.sparse import csr_matrix
+
+def buildIncidenceMatrix(fingerprints: list[set[int]]) -> csr_matrix:
+    """
+    Build the file × subtree hash incidence matrix
+
+    Parameters:
+        fingerprints (list[set[int]]): Subtree hashes of each file
+
+    Returns:
+        csr_matrix: Matrix with a 1 where the file contains the subtree hash
+    """
+    sizes = np.fromiter((len(fingerprint) for fingerprint in fingerprints), dtype=np.int64, count=len(fingerprints))
+    indptr = np.zeros(len(fingerprints) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=indptr[1:])
+
+    hashes = np.fromiter(
+        (hash_value for fingerprint in fingerprints for hash_value in fingerprint),
+        dtype=np.uint64,
+        count=int(indptr[-1])
+    )
+
+    # Cada hash distinto se convierte en una columna
+    vocabulary, columns = np.unique(hashes, return_inverse=True)
+    data = np.ones(len(columns), dtype=np.int32)
+
+    return csr_matrix((data, columns, indptr), shape=(len(fingerprints), len(vocabulary)))
+
+def compareMatrixUseCase(fingerprints: list[set[int]], block_pairs: int = 1 << 20) -> Iterator[tuple[int, int, float]]:
+    """
+    Compare every unique pair of files with sparse matrix products
+
+    The intersection sizes of all pairs are the entries of X·Xᵀ, where X is
+    the incidence matrix. The product is computed by blocks of rows against
+    the later rows only and the pairs of each block are yielded, row by row,
+    before the next one is computed. Common subtrees make almost every pair
+    share some hash, so each block takes as many rows as fit in block_pairs
+    pairs and memory is bounded by that budget and not by the number of
+    files. The pairs with nothing in common, whose similarity is 0, are left
+    out.
+
+    Parameters:
+        fingerprints (list[set[int]]): Subtree hashes of each file
+        block_pairs (int): Pairs multiplied at once, at least one row per block
+
+    Returns:
+        Iterator[tuple[int, int, float]]: Indexes and similarity of each pair with
+        subtrees in common, in row-major order, the same values returned by
+        compareTreesUseCase
+    """
+    n = len(fingerprints)
+
+    if n < 2:
+        return
+
+    matrix = buildIncidenceMatrix(fingerprints)
+    sizes = np.diff(matrix.indptr)
+    start = 0
+
+    while start < n:
+        # Filas del bloque según los pares que caben en el presupuesto
+        end = min(n, start + max(1, block_pairs // (n - start)))
+        product = (matrix[start:end] @ matrix[start:].T).tocoo()
+
+        rows = product.row.astype(np.int64) + start
+        columns = product.col.astype(np.int64) + start
+        upper = columns > rows
+        rows, columns = rows[upper], columns[upper]
+        matches = product.data[upper].astype(np.float64)
+        del product
+
+        # Jaccard: coincidencias sobre el total de subárboles únicos
+        total_unique_subtrees = sizes[rows] + sizes[columns] - matches
+        similarities = (matches / total_unique_subtrees) * 100
+
+        order = np.lexsort((columns, rows))
+        rows, columns, similarities = rows[order], columns[order], similarities[order]
+
+        # Solo los pares de una fila pasan a objetos de Python a la vez
+        bounds = np.searchsorted(rows, np.arange(start, end + 1))
+        for row, (low, high) in enumerate(zip(bounds[:-1].tolist(), bounds[1:].tolist()), start):
+            yield from zip([row] * (high - low), columns[low:high].tolist(), similarities[low:high].tolist())
+
+        start = end
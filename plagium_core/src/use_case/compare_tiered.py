@@ -0,0 +1,66 @@
+import numpy as np
+from src.use_case.compare_lsh import minhashSignatures
+from src.use_case.compare_trees import compareTreesUseCase
+
+# Tolerancia para que la cota de tamaños nunca descarte un par por redondeo
+EPSILON = 1e-9
+
+def compareTieredUseCase(fingerprints: list[set[int]], cutoff: float, min_similarity: float = 0, permutations: int = 128, counters: dict | None = None) -> list[tuple[int, int, float]]:
+    """
+    Compare the files in stages, each one only scoring the pairs left by the
+    cheaper stage before it
+
+    The first stage runs over every pair with numpy: pairs whose sizes can
+    not reach the cutoff are dropped, as the similarity is never above the
+    ratio of the smaller fingerprint to the larger, and then the pairs whose
+    similarity estimated from their MinHash signatures is below the cutoff.
+    The second stage scores the remaining pairs exactly with
+    compareTreesUseCase and keeps the ones of at least min_similarity. The
+    estimate can miss pairs just above the cutoff, so the cutoff should be
+    below the similarities that matter.
+
+    Parameters:
+        fingerprints (list[set[int]]): Subtree hashes of each file
+        cutoff (float): Percentage of similarity a pair needs in the first stage
+        min_similarity (float): Percentage of exact similarity a pair needs to be kept
+        permutations (int): Length of the MinHash signatures, more are slower but closer
+        counters (dict | None): Filled with the number of pairs under "pairs", the
+        pairs eliminated by each stage under "size", "sketch" and "exact" and
+        the pairs kept under "kept"
+
+    Returns:
+        list[tuple[int, int, float]]: Indexes and similarity of each kept pair, sorted
+    """
+    files_count = len(fingerprints)
+    eliminated = {"size": 0, "sketch": 0, "exact": 0}
+    results = []
+
+    sizes = np.array([len(fingerprint) for fingerprint in fingerprints], dtype=np.float64)
+    signatures = minhashSignatures(fingerprints, permutations)
+
+    for i in range(files_count - 1):
+        others = np.arange(i + 1, files_count)
+
+        # Cota superior exacta: la similitud nunca supera el cociente de tamaños
+        larger = np.maximum(sizes[i], sizes[others])
+        bound = np.divide(np.minimum(sizes[i], sizes[others]), larger, out=np.zeros_like(larger), where=larger > 0) * 100
+        others = others[bound >= cutoff - EPSILON]
+        eliminated["size"] += files_count - i - 1 - len(others)
+
+        # Estimación con la fracción de mínimos iguales de las firmas
+        estimates = (signatures[others] == signatures[i]).mean(axis=1) * 100
+        candidates = others[estimates >= cutoff]
+        eliminated["sketch"] += len(others) - len(candidates)
+
+        for j in candidates.tolist():
+            similarity = compareTreesUseCase(fingerprints[i], fingerprints[j])
+
+            if similarity >= min_similarity:
+                results.append((i, j, similarity))
+            else:
+                eliminated["exact"] += 1
+
+    if counters is not None:
+        counters.update(pairs=files_count * (files_count - 1) // 2, **eliminated, kept=len(results))
+
+    return results
@@ -1,67 +1,107 @@
 from antlr4 import *
+from src.entities.compact_tree import CompactTree
 
-def getSubtrees(tree: ParserRuleContext) -> list[ParserRuleContext]:
+# Hash polinomial de 64 bits, independiente de PYTHONHASHSEED
+HASH_SEED = 0xcbf29ce484222325
+HASH_BASE = 0x100000001b3
+HASH_MASK = (1 << 64) - 1
+
+# Versión de los hashes, cambiarla invalida las huellas guardadas en caché
+ENGINE_VERSION = "1"
+
+# Desplazamiento que separa los tipos de token de los índices de regla
+TOKEN_KEY_OFFSET = 1 << 16
+
+# Bit que separa los tipos de nodo de ast de las claves de ANTLR
+AST_KEY_BIT = 1 << 30
+
+def nodeKey(node: ParserRuleContext) -> int:
     """
-    Get all subtrees of a tree
+    Get the integer key that identifies the kind of a node
 
     Parameters:
-        tree (ParserRuleContext): Tree to get the subtrees from
+        node (ParserRuleContext): Rule context or terminal node
 
     Returns:
-        List[ParserRuleContext]: List of subtrees
+        int: Rule index for rule nodes, offset token type for terminal nodes
     """
-    subtrees = [tree]
+    if isinstance(node, TerminalNode):
+        return TOKEN_KEY_OFFSET + node.getSymbol().type
 
-    for i in range(tree.getChildCount()):
-        subtrees.extend(getSubtrees(tree.getChild(i)))
+    return node.getRuleIndex()
 
-    return subtrees
-
-def hashSubtree(subtree: ParserRuleContext) -> int:
+def hashNode(key: int, child_hashes: list[int]) -> int:
     """
-    Generate a hash for a subtree.
+    Generate the 64-bit hash of a node from its key and its children hashes
 
     Parameters:
-        subtree (ParserRuleContext): Subtree to hash
+        key (int): Node key, see nodeKey
+        child_hashes (list[int]): Hashes of the node children, in order
 
     Returns:
-        int: Hash value
+        int: Unsigned 64-bit hash value
     """
-    # Implementación simple: usa una combinación de tipos de nodos y su estructura.
-    # Nota: Esta es una implementación básica y puede necesitar ser más sofisticada.
-    hash_value = 7
-    node_type = type(subtree).__name__
-    hash_value = 31 * hash_value + hash(node_type)
+    hash_value = (HASH_SEED * HASH_BASE + key) & HASH_MASK
 
-    for i in range(subtree.getChildCount()):
-        child = subtree.getChild(i)
-        hash_value = 31 * hash_value + hashSubtree(child)
+    for child_hash in child_hashes:
+        hash_value = (hash_value * HASH_BASE + child_hash) & HASH_MASK
 
     return hash_value
 
-def compareTreesUseCase(tree1: ParserRuleContext, tree2: ParserRuleContext) -> float:
+def fingerprintTree(tree: CompactTree) -> set[int]:
+    """
+    Generate the set of subtree hashes of a tree in a single pass.
+
+    The nodes are visited from the last to the first, so in a pre-order
+    layout every node hash is built once from the already computed hashes of
+    its children and deep trees do not hit the recursion limit.
+
+    Parameters:
+        tree (CompactTree): Tree to fingerprint, see parseCode
+
+    Returns:
+        set[int]: Hashes of every subtree of the tree
+    """
+    node_hashes = [0] * len(tree)
+
+    for index in range(len(tree) - 1, -1, -1):
+        node_hashes[index] = hashNode(tree.keys[index], [node_hashes[child] for child in tree.children(index)])
+
+    return set(node_hashes)
+
+def similarityFromCounts(matches: int, first_size: int, second_size: int) -> float:
     """
-    Compare two trees and return if they have any subtree in common
+    Get the percentage of similarity of two fingerprints from their sizes
 
     Parameters
-        tree1 (ParserRuleContext): First tree
-        tree2 (ParserRuleContext): Second tree
+        matches (int): Number of subtree hashes in common
+        first_size (int): Number of subtree hashes of the first fingerprint
+        second_size (int): Number of subtree hashes of the second fingerprint
 
     Returns
         float: Percentage of similarity
     """
-    first_subtrees = getSubtrees(tree1)
-    second_subtrees = getSubtrees(tree2)
-
-    first_hashes = {hashSubtree(subtree) for subtree in first_subtrees}
-    second_hashes = {hashSubtree(subtree) for subtree in second_subtrees}
-
-    # Calcula las coincidencias y el total de subárboles únicos
-    matches = first_hashes.intersection(second_hashes)
-    total_unique_subtrees = len(first_hashes) + len(second_hashes) - len(matches)
+    # Total de subárboles únicos
+    total_unique_subtrees = first_size + second_size - matches
 
     if total_unique_subtrees == 0:
         return 0  # Evita la división por cero
 
-    similarity_percentage = (len(matches) / total_unique_subtrees) * 100
+    similarity_percentage = (matches / total_unique_subtrees) * 100
     return similarity_percentage
+
+def compareTreesUseCase(first_hashes: set[int], second_hashes: set[int]) -> float:
+    """
+    Compare the fingerprints of two trees and return if they have any subtree in common
+
+    Parameters
+        first_hashes (set[int]): Subtree hashes of the first tree, see fingerprintTree
+        second_hashes (set[int]): Subtree hashes of the second tree, see fingerprintTree
+
+    Returns
+        float: Percentage of similarity
+    """
+    # Calcula las coincidencias entre los subárboles
+    matches = first_hashes.intersection(second_hashes)
+
+    return similarityFromCounts(len(matches), len(first_hashes), len(second_hashes))
@@ -0,0 +1,35 @@
+from collections.abc import Iterable
+from io import BytesIO
+import numpy as np
+
+MATRIX_MIMETYPE = "application/x-npz"
+
+def encodeMatrixUseCase(names: list[str], scored: Iterable[tuple[int, int, float]], dtype: str = "float32") -> bytes:
+    """
+    Encode the similarity report as a NumPy .npz archive
+
+    The archive holds a "names" array with the file of each index and a
+    "similarity" array with the condensed upper triangle of the similarity
+    matrix: the pair (i, j) with i < j is at i * n - i * (i + 1) / 2 + j - i - 1,
+    the same layout as scipy.spatial.distance.squareform. Pairs left out of
+    the report are NaN. It can be read back with numpy.load.
+
+    Parameters:
+        names (list[str]): Name of each file
+        scored (Iterable[tuple[int, int, float]]): Indexes and similarity of each pair
+        dtype (str): "float16" or "float32"
+
+    Returns:
+        bytes: Content of the .npz archive
+    """
+    n = len(names)
+    similarity = np.full(n * (n - 1) // 2, np.nan, dtype=np.dtype(dtype))
+
+    triples = np.array(list(scored), dtype=np.float64).reshape(-1, 3)
+    rows = triples[:, 0].astype(np.int64)
+    columns = triples[:, 1].astype(np.int64)
+    similarity[rows * n - rows * (rows + 1) // 2 + columns - rows - 1] = triples[:, 2]
+
+    buffer = BytesIO()
+    np.savez(buffer, names=np.array(names, dtype=np.str_), similarity=similarity)
+    return buffer.getvalue()
\ No newline at end of file
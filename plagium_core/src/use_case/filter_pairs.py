@@ -0,0 +1,48 @@
+from collections.abc import Iterable, Iterator
+from heapq import heappush, heappushpop
+
+def filterPairsUseCase(scored: Iterable[tuple[int, int, float]], files_count: int, min_similarity: float = 0, top_k_per_file: int | None = None) -> Iterable[tuple[int, int, float]]:
+    """
+    Keep only the pairs of the report the grader needs
+
+    Pairs below the minimum similarity are dropped as they are scored. When
+    top_k_per_file is given, each file keeps a bounded heap with its most
+    similar partners and a pair is kept if it is in the top of either file,
+    so memory grows with files_count * top_k_per_file and not with the pairs.
+
+    Parameters:
+        scored (Iterable[tuple[int, int, float]]): Indexes and similarity of each pair
+        files_count (int): Number of files compared
+        min_similarity (float): Minimum percentage of similarity to keep a pair
+        top_k_per_file (int | None): Most similar pairs kept for each file, all of them when None
+
+    Returns:
+        Iterable[tuple[int, int, float]]: Kept pairs, in the same order when
+        top_k_per_file is None, sorted by indexes otherwise
+    """
+    if top_k_per_file is None:
+        return filterMinSimilarity(scored, min_similarity)
+
+    heaps = [[] for _ in range(files_count)]
+
+    for i, j, similarity in filterMinSimilarity(scored, min_similarity):
+        for file, other in ((i, j), (j, i)):
+            if len(heaps[file]) < top_k_per_file:
+                heappush(heaps[file], (similarity, other))
+            elif top_k_per_file > 0 and (similarity, other) > heaps[file][0]:
+                heappushpop(heaps[file], (similarity, other))
+
+    kept = {
+        (min(file, other), max(file, other)): similarity
+        for file, heap in enumerate(heaps) for similarity, other in heap
+    }
+
+    return [(i, j, similarity) for (i, j), similarity in sorted(kept.items())]
+
+def filterMinSimilarity(scored: Iterable[tuple[int, int, float]], min_similarity: float) -> Iterator[tuple[int, int, float]]:
+    """
+    Drop the pairs below the minimum similarity, see filterPairsUseCase
+    """
+    for pair in scored:
+        if pair[2] >= min_similarity:
+            yield pair
\ No newline at end of file
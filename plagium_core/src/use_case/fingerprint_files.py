@@ -0,0 +1,172 @@
+from array import array
+from collections.abc import Callable, Iterator
+from hashlib import sha256
+from functools import partial
+from src.use_case.parse_code import ParseError, parseCode, streamFingerprint
+from src.use_case.compare_trees import fingerprintTree
+from src.use_case.winnow_tokens import winnowCode
+from src.use_case.compare_files import packFingerprint
+from src.gateways.fingerprint_cache import FingerprintCache
+from src.workers import getExecutor, getIsolatedPool
+
+def contentDigest(code: str) -> str:
+    """
+    Get the SHA-256 digest that identifies the content of a file
+
+    Parameters:
+        code (str): Code string
+
+    Returns:
+        str: Hexadecimal digest
+    """
+    return sha256(code.encode("utf-8")).hexdigest()
+
+def fingerprintCode(code: str, max_errors: int | None = None, streaming: bool = False, backend: str = "antlr", winnow: tuple[int, int] | None = None) -> tuple[set[int] | None, dict]:
+    """
+    Parse a code string and generate the set of its subtree hashes
+
+    Parameters:
+        code (str): Code string
+        max_errors (int | None): Syntax errors allowed, see parseCode
+        streaming (bool): Generate the hashes while parsing instead of from the
+        parse tree, see streamFingerprint, only with the "antlr" backend
+        backend (str): Parser to use, see parseCode
+        winnow (tuple[int, int] | None): kgram and window of the token winnowing
+        engine, see winnowCode, None for the subtree hashes of the parse tree
+
+    Returns:
+        tuple[set[int] | None, dict]: Hashes of every subtree of the code and the parse
+        metrics, see parseCode. When the code has too many syntax errors the
+        hashes are None and the metrics have "status" set to "syntax_error"
+        and the errors under "error", when it is too deeply nested to parse
+        "status" is set to "error"
+    """
+    metrics = {}
+
+    try:
+        if winnow is not None:
+            fingerprint = winnowCode(code, metrics, max_errors, *winnow)
+        elif streaming and backend == "antlr":
+            fingerprint = streamFingerprint(code, metrics, max_errors)
+        else:
+            fingerprint = fingerprintTree(parseCode(code, metrics, max_errors, backend))
+    except ParseError as error:
+        return None, {"status": "syntax_error", "error": str(error)}
+    except RecursionError as error:
+        # Anidamientos extremos agotan la pila del parser en cualquier ejecutor,
+        # MemoryError sigue hasta el proceso aislado, que lo marca "oom" y lo reemplaza
+        return None, {"status": "error", "error": f"RecursionError: {error}"}
+
+    return fingerprint, metrics
+
+def fingerprintPacked(code: str, max_errors: int | None = None, streaming: bool = False, backend: str = "antlr", winnow: tuple[int, int] | None = None) -> tuple[array | None, dict]:
+    """
+    Same as fingerprintCode, packed to be sent back from a worker process
+
+    Parameters:
+        code (str): Code string
+        max_errors (int | None): Syntax errors allowed, see parseCode
+        streaming (bool): Generate the hashes while parsing, see fingerprintCode
+        backend (str): Parser to use, see parseCode
+        winnow (tuple[int, int] | None): Use the token winnowing engine, see fingerprintCode
+
+    Returns:
+        tuple[array | None, dict]: Sorted subtree hashes, see packFingerprint, and the parse metrics
+    """
+    fingerprint, metrics = fingerprintCode(code, max_errors, streaming, backend, winnow)
+
+    return None if fingerprint is None else packFingerprint(fingerprint), metrics
+
+def fingerprintFilesUseCase(codes: list[str], executor: str, workers: int, cache: FingerprintCache | None = None, on_parsed: Callable[[int], None] | None = None, max_errors: int | None = None, timeout: float | None = None, max_rss: int | None = None, streaming: bool = False, backend: str = "antlr", winnow: tuple[int, int] | None = None) -> list[tuple[set[int] | None, dict]]:
+    """
+    Parse and fingerprint every file, spreading the files over the workers
+
+    The parse trees never leave the workers, only the packed fingerprints are
+    gathered back. Files already in the cache are not parsed again. With the
+    "process" executor each file runs in an isolated worker under the time
+    and memory limits, the worker is killed and replaced when a file goes
+    over them.
+
+    Parameters:
+        codes (list[str]): Code string of each file
+        executor (str): "process", "thread" or "serial"
+        workers (int): Number of workers to use
+        cache (FingerprintCache | None): Cache of fingerprints by content digest
+        on_parsed (Callable[[int], None] | None): Called with the number of files done, to report progress
+        max_errors (int | None): Syntax errors allowed, see parseCode
+        timeout (float | None): Seconds each file may take, None for no limit
+        max_rss (int | None): Bytes of resident memory each worker may use, None for no limit
+        streaming (bool): Generate the hashes while parsing, see fingerprintCode
+        backend (str): Parser to use, see parseCode
+        winnow (tuple[int, int] | None): Use the token winnowing engine, see fingerprintCode
+
+    Returns:
+        list[tuple[set[int] | None, dict]]: Subtree hashes and metrics of each file, in the same order,
+        see fingerprintCode. The metrics of cached files only have "parse" set to "cached", those of
+        files over a limit have "status" set to "timeout" or "oom"
+    """
+    options = (max_errors, timeout, max_rss, streaming, backend, winnow)
+
+    if cache is None:
+        return parseFiles(codes, executor, workers, on_parsed, *options)
+
+    digests = [contentDigest(code) for code in codes]
+    cached = {digest: (fingerprint, {"parse": "cached"}) for digest, fingerprint in cache.get(digests).items()}
+    missing = [i for i, digest in enumerate(digests) if digest not in cached]
+
+    if on_parsed is not None and cached:
+        on_parsed(len(codes) - len(missing))
+
+    # Solo se parsean los archivos que no están en caché
+    parsed = parseFiles([codes[i] for i in missing], executor, workers, on_parsed, *options)
+
+    # Solo se guardan los archivos sin errores, su huella no depende de la política
+    cache.put({
+        digests[i]: fingerprint
+        for i, (fingerprint, metrics) in zip(missing, parsed)
+        if fingerprint is not None and metrics.get("syntax_errors") == 0
+    })
+    cached.update((digests[i], result) for i, result in zip(missing, parsed))
+
+    return [cached[digest] for digest in digests]
+
+def parseFiles(codes: list[str], executor: str, workers: int, on_parsed: Callable[[int], None] | None = None, max_errors: int | None = None, timeout: float | None = None, max_rss: int | None = None, streaming: bool = False, backend: str = "antlr", winnow: tuple[int, int] | None = None) -> list[tuple[set[int] | None, dict]]:
+    """
+    Parse and fingerprint every file on the executor, see fingerprintFilesUseCase
+    """
+    pool = getExecutor(executor, workers)
+    fingerprint_code = partial(fingerprintCode, max_errors=max_errors, streaming=streaming, backend=backend, winnow=winnow)
+    on_parsed = on_parsed or (lambda count: None)
+
+    # Archivos grandes primero para equilibrar la carga entre procesos
+    order = sorted(range(len(codes)), key=lambda i: len(codes[i]), reverse=True)
+
+    if pool is None:
+        results = zip(order, map(fingerprint_code, [codes[i] for i in order]))
+    elif executor == "thread":
+        results = zip(order, pool.map(fingerprint_code, [codes[i] for i in order]))
+    else:
+        results = isolatedResults(
+            getIsolatedPool(workers, timeout, max_rss).map(partial(fingerprintPacked, max_errors=max_errors, streaming=streaming, backend=backend, winnow=winnow), [codes[i] for i in order]),
+            order
+        )
+
+    fingerprints = [None] * len(codes)
+    for i, (fingerprint, metrics) in results:
+        if fingerprint is not None and not isinstance(fingerprint, set):
+            fingerprint = set(fingerprint)
+
+        fingerprints[i] = (fingerprint, metrics)
+        on_parsed(1)
+
+    return fingerprints
+
+def isolatedResults(results: Iterator[tuple[int, str, object]], order: list[int]) -> Iterator[tuple[int, tuple[array | None, dict]]]:
+    """
+    Turn the results of an isolated pool into the results of fingerprintPacked, see parseFiles
+    """
+    for position, status, result in results:
+        if status == "ok":
+            yield order[position], result
+        else:
+            yield order[position], (None, {"status": status, "error": result})
\ No newline at end of file
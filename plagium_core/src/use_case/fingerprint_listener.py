@@ -0,0 +1,49 @@
+from antlr4 import *
+from src.use_case.compare_trees import TOKEN_KEY_OFFSET, hashNode
+
+class FingerprintListener(ParseTreeListener):
+    """
+    Parse listener that generates the subtree hashes while the parser runs,
+    so the parse tree never has to be built
+
+    Each rule being parsed has a frame on the stack with the hashes of its
+    children done so far, and its own hash is built when the rule exits, so
+    only one frame per level of depth is alive at any time.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the hashes of a previous parse
+        """
+        self.hashes = set()
+        self.frames = [[]]
+        self.last_exited = None
+
+    def addHash(self, hash_value: int):
+        self.hashes.add(hash_value)
+        self.frames[-1].append(hash_value)
+
+    def enterEveryRule(self, ctx: ParserRuleContext):
+        # En una regla recursiva por la izquierda, el contexto recién cerrado
+        # pasa a ser el primer hijo del nuevo
+        if self.last_exited is not None and self.last_exited.parentCtx is ctx:
+            self.frames.append([self.frames[-1].pop()])
+        else:
+            self.frames.append([])
+
+        self.last_exited = None
+
+    def exitEveryRule(self, ctx: ParserRuleContext):
+        child_hashes = self.frames.pop()
+        self.addHash(hashNode(ctx.getRuleIndex(), child_hashes))
+        self.last_exited = ctx
+
+    def visitTerminal(self, node: TerminalNode):
+        self.addHash(hashNode(TOKEN_KEY_OFFSET + node.getSymbol().type, []))
+        self.last_exited = None
+
+    def visitErrorNode(self, node: ErrorNode):
+        self.visitTerminal(node)
@@ -1,23 +1,360 @@
+import ast
+from threading import local
+from zlib import crc32
+from time import perf_counter
 from antlr4 import *
+from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.dfa.DFAState import DFAState
+from antlr4.error.ErrorListener import ConsoleErrorListener, ErrorListener
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
 from ..parser.Python3Lexer import Python3Lexer
 from ..parser.Python3Parser import Python3Parser
+from ..entities.compact_tree import CompactTree
+from .compare_trees import AST_KEY_BIT, nodeKey
+from .fingerprint_listener import FingerprintListener
 
-def parseCode(code: str) -> dict:
+class ParseError(Exception):
     """
-    Parse a code string and return a dictionary with the information
+    Raised when a code string has more syntax errors than allowed
+    """
+
+    def __init__(self, errors: list[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+class SyntaxErrorCollector(ErrorListener):
+    """
+    Error listener that records the syntax errors and stops the parse by
+    raising ParseError once there are more than max_errors
+    """
+
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.errors = []
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.errors.append(f"line {line}:{column} {msg}")
+
+        if len(self.errors) > self.max_errors:
+            raise ParseError(self.errors)
+
+class StartCachingLexerATNSimulator(LexerATNSimulator):
+    """
+    Lexer simulator that keeps the DFA start state of every token
+
+    The NEWLINE rule of Python3Lexer starts with the atStartOfInput predicate,
+    so ANTLR never stores the start state of the lexer DFA and computes its
+    whole closure again for every token, which takes most of the time of
+    lexing. The predicate only holds at the first character, so the start
+    state of any other position is always the same and is kept here, shared
+    by every lexer of the process like the DFAs.
+    """
+    start_states: dict[int, DFAState] = {}
+
+    def matchATN(self, input: InputStream):
+        if input.index == 0:
+            return super().matchATN(input)
+
+        start_state = self.start_states.get(self.mode)
+        if start_state is None:
+            closure = self.computeStartState(input, self.atn.modeToStartState[self.mode])
+            closure.hasSemanticContext = False
+            start_state = self.start_states[self.mode] = self.addDFAState(closure)
+
+        return self.execATN(input, start_state)
+
+# Lexer y parser reutilizables de cada hilo de cada proceso
+_recognizers = local()
+
+def getRecognizers(code: str) -> tuple[Python3Lexer, Python3Parser]:
+    """
+    Get the lexer and parser of the current thread pointed at a new code string
+
+    The first call of each thread builds them, the next ones only reset them
+    and set the new input, saving their construction on every file.
+
+    Parameters
+        code (str): Code string
+
+    Returns
+        tuple[Python3Lexer, Python3Parser]: Lexer and parser ready to parse the code
+    """
+    if not hasattr(_recognizers, "parser"):
+        lexer = Python3Lexer(InputStream(code))
+        lexer._interp = StartCachingLexerATNSimulator(lexer, lexer.atn, lexer.decisionsToDFA, PredictionContextCache())
+        _recognizers.lexer = lexer
+        _recognizers.stream = CommonTokenStream(lexer)
+        _recognizers.parser = Python3Parser(_recognizers.stream)
+
+        return _recognizers.lexer, _recognizers.parser
+
+    _recognizers.lexer.inputStream = InputStream(code)
+    _recognizers.stream.setTokenSource(_recognizers.lexer)
+    _recognizers.parser.setTokenStream(_recognizers.stream)
+
+    return _recognizers.lexer, _recognizers.parser
+
+def nodeLines(node: ParserRuleContext) -> tuple[int, int]:
+    """
+    Get the first and last lines spanned by a node
+
+    Parameters:
+        node (ParserRuleContext): Rule context or terminal node
+
+    Returns:
+        tuple[int, int]: Start and stop lines, 0 when the node has no tokens
+    """
+    if isinstance(node, TerminalNode):
+        token = node.getSymbol()
+        # Los strings de varias líneas terminan más abajo que su primer token
+        return token.line, token.line + (token.text or "").rstrip().count("\n")
+
+    start = node.start.line if node.start is not None else 0
+    stop = node.stop.line if node.stop is not None else start
+
+    # Las reglas vacías tienen como stop el token anterior a su start
+    return start, max(start, stop)
+
+def compactTree(tree: ParserRuleContext) -> CompactTree:
+    """
+    Convert an ANTLR parse tree to its array-backed form
+
+    The tree is walked iteratively in pre-order, so deep trees do not hit the
+    recursion limit, and the subtree sizes are added up afterwards.
+
+    Parameters:
+        tree (ParserRuleContext): Parse tree
+
+    Returns:
+        CompactTree: Same tree without any ANTLR object
+    """
+    compact = CompactTree()
+    stack = [(tree, -1)]
+
+    while stack:
+        node, parent = stack.pop()
+        index = len(compact.keys)
+        start, stop = nodeLines(node)
+
+        compact.keys.append(nodeKey(node))
+        compact.parents.append(parent)
+        compact.start_lines.append(start)
+        compact.stop_lines.append(stop)
+
+        for i in range(node.getChildCount() - 1, -1, -1):
+            stack.append((node.getChild(i), index))
+
+    compact.fillSizes()
+
+    return compact
+
+def runParser(code: str, metrics: dict | None = None, max_errors: int | None = None, listener: ParseTreeListener | None = None) -> ParserRuleContext | None:
+    """
+    Parse a code string with the lexer and parser of the current thread
+
+    The parser first runs in SLL prediction mode, bailing out on the first
+    error. Only when that fails, because the code is ambiguous for SLL or has
+    syntax errors, it is parsed again in full LL mode with the default error
+    recovery.
 
     Parameters
         code (str): Code string
+        metrics (dict | None): Filled with the prediction mode used, "sll" or "ll",
+        under "parse", the parse time under "parse_seconds" and the number of
+        syntax errors recovered under "syntax_errors"
+        max_errors (int | None): Syntax errors allowed before giving up, 0 to fail
+        on the first one, None to always recover
+        listener (ParseTreeListener | None): Parse listener notified while parsing,
+        with a listener the parse tree is not built
 
     Returns
-        dict: Dictionary with the information of the code
+        ParserRuleContext | None: Parse tree of the code, None with a listener
+
+    Raises
+        ParseError: When the code has more than max_errors syntax errors
     """
-    # Create the lexer and parser
-    lexer = Python3Lexer(InputStream(code))
-    stream = CommonTokenStream(lexer)
-    parser = Python3Parser(stream)
+    started = perf_counter()
+
+    # Get the lexer and parser
+    lexer, parser = getRecognizers(code)
+
+    # Con un límite de errores, se recogen en lugar de imprimirse
+    collector = None
+    lexer.removeErrorListeners()
+    if max_errors is not None:
+        collector = SyntaxErrorCollector(max_errors)
+        lexer.addErrorListener(collector)
+    else:
+        lexer.addErrorListener(ConsoleErrorListener.INSTANCE)
+
+    parser.buildParseTrees = listener is None
+    if listener is not None:
+        parser.addParseListener(listener)
+
+    # Primera etapa: SLL, rápido y correcto para casi todo código válido
+    parser._interp.predictionMode = PredictionMode.SLL
+    parser._errHandler = BailErrorStrategy()
+    parser.removeErrorListeners()
+    mode = "sll"
 
-    # Get the tree
-    tree = parser.file_input()
+    try:
+        try:
+            tree = parser.file_input()
+        except ParseCancellationException:
+            # Segunda etapa: LL completo, reutilizando los tokens ya leídos.
+            # reset falla con listeners de parseo, se quitan mientras tanto
+            parser.removeParseListeners()
+            parser.reset()
+            parser._interp.predictionMode = PredictionMode.LL
+            parser._errHandler = DefaultErrorStrategy()
+            parser.addErrorListener(collector or ConsoleErrorListener.INSTANCE)
+            mode = "ll"
+
+            if listener is not None:
+                listener.reset()
+                parser.addParseListener(listener)
+
+            tree = parser.file_input()
+    finally:
+        # Se sueltan los tokens y el listener para que no sigan vivos
+        parser.removeParseListeners()
+        _recognizers.stream.setTokenSource(lexer)
+
+    if metrics is not None:
+        metrics["parse"] = mode
+        metrics["parse_seconds"] = perf_counter() - started
+        metrics["syntax_errors"] = len(collector.errors) if collector else parser.getNumberOfSyntaxErrors()
+
+    return None if listener is not None else tree
+
+def parseAntlr(code: str, metrics: dict | None = None, max_errors: int | None = None) -> CompactTree:
+    """
+    Parse a code string with the ANTLR grammar, see runParser and compactTree
+    """
+    return compactTree(runParser(code, metrics, max_errors))
+
+def astKey(node: ast.AST) -> int:
+    """
+    Get the integer key that identifies the kind of an ast node
+
+    The key comes from the class name, so it does not depend on the order of
+    the classes in the ast module of each Python version. Constants are also
+    told apart by the type of their value, like the tokens of the grammar.
+
+    Parameters:
+        node (ast.AST): Node of an ast tree
+
+    Returns:
+        int: Key with AST_KEY_BIT set, apart from the keys of nodeKey
+    """
+    name = type(node).__name__
+    if isinstance(node, ast.Constant):
+        name = f"{name}.{type(node.value).__name__}"
+
+    return AST_KEY_BIT | (crc32(name.encode()) & (AST_KEY_BIT - 1))
+
+def parseAst(code: str, metrics: dict | None = None, max_errors: int | None = None) -> CompactTree:
+    """
+    Parse a code string with the built-in parser of CPython
+
+    The ast module stops on the first syntax error and can not recover from
+    it, so any syntax error raises ParseError whatever max_errors is.
+
+    Parameters
+        code (str): Code string
+        metrics (dict | None): Filled with "ast" under "parse", the parse time
+        under "parse_seconds" and 0 under "syntax_errors"
+        max_errors (int | None): Not used, see parseCode
+
+    Returns
+        CompactTree: Abstract syntax tree of the code, with ast node kinds as keys
+
+    Raises
+        ParseError: When the code has a syntax error
+    """
+    started = perf_counter()
+
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as error:
+        raise ParseError([f"line {error.lineno}:{error.offset} {error.msg}"]) from error
+    except ValueError as error:
+        raise ParseError([str(error)]) from error
+
+    compact = CompactTree()
+    stack = [(tree, -1)]
+
+    while stack:
+        node, parent = stack.pop()
+        index = len(compact.keys)
+        start = getattr(node, "lineno", 0)
+
+        compact.keys.append(astKey(node))
+        compact.parents.append(parent)
+        compact.start_lines.append(start)
+        compact.stop_lines.append(getattr(node, "end_lineno", None) or start)
+
+        stack.extend((child, index) for child in reversed(list(ast.iter_child_nodes(node))))
+
+    compact.fillSizes()
+
+    if metrics is not None:
+        metrics["parse"] = "ast"
+        metrics["parse_seconds"] = perf_counter() - started
+        metrics["syntax_errors"] = 0
+
+    return compact
+
+# Backends de parseo disponibles, por nombre
+PARSE_BACKENDS = {
+    "antlr": parseAntlr,
+    "ast": parseAst
+}
+
+def parseCode(code: str, metrics: dict | None = None, max_errors: int | None = None, backend: str = "antlr") -> CompactTree:
+    """
+    Parse a code string and return its compact parse tree
+
+    Trees of different backends have different node kinds, so their
+    fingerprints can only be compared with those of the same backend.
+
+    Parameters
+        code (str): Code string
+        metrics (dict | None): Filled with the parse metrics, see runParser
+        max_errors (int | None): Syntax errors allowed, see runParser
+        backend (str): Parser to use, "antlr" or "ast", see PARSE_BACKENDS
+
+    Returns
+        CompactTree: Parse tree of the code, see compactTree
+
+    Raises
+        ParseError: When the code has more than max_errors syntax errors
+    """
+    return PARSE_BACKENDS[backend](code, metrics, max_errors)
+
+def streamFingerprint(code: str, metrics: dict | None = None, max_errors: int | None = None) -> set[int]:
+    """
+    Parse a code string and generate its subtree hashes without building the
+    parse tree, see FingerprintListener
+
+    The memory used grows with the depth of the tree instead of its size. The
+    hashes are the same as those of fingerprintTree, except for the missing
+    tokens made up by the error recovery, which are not part of them.
+
+    Parameters
+        code (str): Code string
+        metrics (dict | None): Filled with the parse metrics, see runParser
+        max_errors (int | None): Syntax errors allowed, see runParser
+
+    Returns
+        set[int]: Hashes of every subtree of the code
+
+    Raises
+        ParseError: When the code has more than max_errors syntax errors
+    """
+    listener = FingerprintListener()
+    runParser(code, metrics, max_errors, listener)
 
-    return tree
\ No newline at end of file
+    return listener.hashes
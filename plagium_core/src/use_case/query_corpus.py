@@ -0,0 +1,30 @@
+from heapq import nlargest
+from src.gateways.corpus_index import CorpusIndex
+from src.use_case.compare_trees import similarityFromCounts
+
+def queryCorpusUseCase(index: CorpusIndex, fingerprint: set[int], limit: int, min_similarity: float = 0, max_frequency: float = 1) -> list[tuple[int, str, float]]:
+    """
+    Score a file against every submission stored in the corpus index
+
+    Parameters:
+        index (CorpusIndex): Index of the stored submissions
+        fingerprint (set[int]): Subtree hashes of the file
+        limit (int): Maximum number of submissions to return
+        min_similarity (float): Minimum percentage of similarity to return a submission
+        max_frequency (float): Fraction of the submissions above which a hash is
+        too common to look for candidates, see CorpusIndex.matches
+
+    Returns:
+        list[tuple[int, str, float]]: Id, name and similarity of the most similar
+        submissions, most similar first
+    """
+    scored = (
+        (submission, name, similarityFromCounts(matches, len(fingerprint), size))
+        for submission, name, size, matches in index.matches(fingerprint, min_similarity, max_frequency)
+    )
+
+    return nlargest(
+        limit,
+        (result for result in scored if result[2] >= min_similarity),
+        key=lambda result: result[2]
+    )
\ No newline at end of file
@@ -0,0 +1,35 @@
+from time import perf_counter
+from src.use_case.parse_code import ParseError, parseCode
+from src.workers import refreshIsolatedPools
+
+def warmUpUseCase(paths: list[str], state: dict):
+    """
+    Parse a corpus of files to fill the DFA caches of the lexer and parser
+
+    The ATNs of Python3Lexer and Python3Parser are deserialized once, when
+    their modules are imported, but the DFAs used for prediction are built
+    lazily while parsing, so the first requests after a start are much
+    slower. The caches are shared by every parser of the process and
+    inherited by the worker processes forked after the warm-up, the isolated
+    workers started before it ends are replaced once they are free.
+
+    Parameters:
+        paths (list[str]): Files of the warm-up corpus
+        state (dict): Filled with "status", "warming" then "ready", the files
+        parsed under "files" and the time taken under "seconds"
+    """
+    started = perf_counter()
+    state.update({"status": "warming", "files": 0})
+
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as file:
+                parseCode(file.read(), max_errors=0)
+        except (OSError, UnicodeDecodeError, ParseError):
+            continue
+
+        state["files"] += 1
+
+    # Los procesos ya creados tienen las cachés frías, se vuelven a crear
+    refreshIsolatedPools()
+    state.update({"status": "ready", "seconds": perf_counter() - started})
\ No newline at end of file
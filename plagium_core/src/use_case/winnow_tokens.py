@@ -0,0 +1,151 @@
+from collections import deque
+from time import perf_counter
+from antlr4 import Token
+from antlr4.error.ErrorListener import ConsoleErrorListener
+from src.use_case.compare_trees import HASH_BASE, HASH_MASK
+from src.use_case.parse_code import SyntaxErrorCollector, getRecognizers
+
+def normalizeTokens(code: str, metrics: dict | None = None, max_errors: int | None = None) -> list[int]:
+    """
+    Split a code string into tokens with Python3Lexer, without parsing it
+
+    Only the token types are kept, so every identifier is the same NAME,
+    every literal the same STRING or NUMBER, and renaming variables or
+    changing constants does not change the result. Comments and blank lines
+    never reach the default channel.
+
+    Parameters
+        code (str): Code string
+        metrics (dict | None): Filled with "tokens" under "parse", the lexing time
+        under "parse_seconds", the number of tokens under "tokens" and the
+        number of lexer errors under "syntax_errors"
+        max_errors (int | None): Lexer errors allowed, see parseCode
+
+    Returns
+        list[int]: Token types of the code, in order
+
+    Raises
+        ParseError: When the code has more than max_errors lexer errors
+    """
+    started = perf_counter()
+    lexer, _ = getRecognizers(code)
+
+    collector = None
+    lexer.removeErrorListeners()
+    if max_errors is not None:
+        collector = SyntaxErrorCollector(max_errors)
+        lexer.addErrorListener(collector)
+    else:
+        lexer.addErrorListener(ConsoleErrorListener.INSTANCE)
+
+    tokens = []
+    token = lexer.nextToken()
+    while token.type != Token.EOF:
+        if token.channel == Token.DEFAULT_CHANNEL:
+            tokens.append(token.type)
+        token = lexer.nextToken()
+
+    if metrics is not None:
+        metrics["parse"] = "tokens"
+        metrics["parse_seconds"] = perf_counter() - started
+        metrics["tokens"] = len(tokens)
+        metrics["syntax_errors"] = len(collector.errors) if collector else 0
+
+    return tokens
+
+def kgramHashes(tokens: list[int], kgram: int) -> list[int]:
+    """
+    Generate the Karp-Rabin hash of every run of kgram consecutive tokens
+
+    Each hash is rolled from the previous one in constant time, dropping the
+    first token of the run and adding the next one.
+
+    Parameters:
+        tokens (list[int]): Token types, see normalizeTokens
+        kgram (int): Tokens of each run
+
+    Returns:
+        list[int]: Unsigned 64-bit hash of each run, len(tokens) - kgram + 1 of them
+    """
+    if len(tokens) < kgram:
+        return []
+
+    # Peso del token que sale de la ventana
+    power = pow(HASH_BASE, kgram - 1, HASH_MASK + 1)
+
+    hash_value = 0
+    for token in tokens[:kgram]:
+        hash_value = (hash_value * HASH_BASE + token) & HASH_MASK
+
+    hashes = [hash_value]
+    for i in range(kgram, len(tokens)):
+        hash_value = ((hash_value - tokens[i - kgram] * power) * HASH_BASE + tokens[i]) & HASH_MASK
+        hashes.append(hash_value)
+
+    return hashes
+
+def winnowHashes(hashes: list[int], window: int) -> set[int]:
+    """
+    Select the fingerprint of a document with the winnowing of MOSS
+
+    The minimum hash of every window of consecutive hashes is selected, the
+    rightmost one on ties, and recorded only when its position changes. Any
+    match of at least window + kgram - 1 tokens shares a selected hash.
+
+    Parameters:
+        hashes (list[int]): Hashes of the k-grams, see kgramHashes
+        window (int): Hashes of each window
+
+    Returns:
+        set[int]: Selected hashes
+    """
+    window = min(window, len(hashes))
+    selected = set()
+    last = -1
+
+    # Posiciones con hashes crecientes, el mínimo de la ventana va delante
+    candidates = deque()
+
+    for i, hash_value in enumerate(hashes):
+        while candidates and hashes[candidates[-1]] >= hash_value:
+            candidates.pop()
+        candidates.append(i)
+
+        if candidates[0] <= i - window:
+            candidates.popleft()
+
+        if i >= window - 1 and candidates[0] != last:
+            last = candidates[0]
+            selected.add(hashes[last])
+
+    return selected
+
+def winnowCode(code: str, metrics: dict | None = None, max_errors: int | None = None, kgram: int = 5, window: int = 4) -> set[int]:
+    """
+    Generate the winnowing fingerprint of a code string from its tokens alone
+
+    The fingerprints are sets of hashes like those of fingerprintTree, so they
+    are scored with compareTreesUseCase and every comparison mode, but they
+    can only be compared with other winnowing fingerprints of the same kgram
+    and window.
+
+    Parameters:
+        code (str): Code string
+        metrics (dict | None): Filled with the lexing metrics, see normalizeTokens
+        max_errors (int | None): Lexer errors allowed, see parseCode
+        kgram (int): Tokens of each hashed run, shorter matches are ignored
+        window (int): Hashes of each winnowing window
+
+    Returns:
+        set[int]: Selected k-gram hashes, one hash of the whole code when it
+        has fewer than kgram tokens
+
+    Raises
+        ParseError: When the code has more than max_errors lexer errors
+    """
+    tokens = normalizeTokens(code, metrics, max_errors)
+
+    if 0 < len(tokens) < kgram:
+        return set(kgramHashes(tokens, len(tokens)))
+
+    return winnowHashes(kgramHashes(tokens, kgram), window)
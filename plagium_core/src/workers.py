@@ -0,0 +1,261 @@
+import multiprocessing
+from math import ceil
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.connection import Connection, wait
+from os import sysconf
+from threading import Lock
+from time import monotonic, sleep
+
+_executors: dict[tuple[str, str, int], Executor] = {}
+_isolated_pools: dict[tuple[int, float | None, int | None], "IsolatedPool"] = {}
+_lock = Lock()
+
+# Intervalo para revisar el tiempo y la memoria de los procesos ocupados
+POLL_SECONDS = 0.05
+
+def getExecutor(kind: str, workers: int, name: str = "default") -> Executor | None:
+    """
+    Get a shared executor, created the first time it is requested
+
+    The pools live for the whole life of the application so the worker
+    processes are not spawned again on every request. A process pool broken
+    by the sudden death of a worker is replaced by a new one.
+
+    Parameters:
+        kind (str): "process", "thread" or "serial"
+        workers (int): Number of workers of the pool
+        name (str): Name of the pool, work that waits on other pools must use its own
+
+    Returns:
+        Executor | None: The executor, or None when the work must run serially
+    """
+    if kind == "serial" or workers < 1:
+        return None
+
+    if kind not in ("process", "thread"):
+        raise ValueError(f"Unknown executor kind: {kind}")
+
+    with _lock:
+        executor = _executors.get((name, kind, workers))
+
+        # Un proceso muerto deja el pool roto para siempre, se crea otro
+        if executor is not None and getattr(executor, "_broken", False):
+            executor.shutdown(wait=False, cancel_futures=True)
+            executor = None
+
+        if executor is None:
+            if kind == "process":
+                executor = ProcessPoolExecutor(workers)
+            else:
+                executor = ThreadPoolExecutor(workers)
+
+            _executors[(name, kind, workers)] = executor
+
+    return executor
+
+def getIsolatedPool(workers: int, timeout: float | None, max_rss: int | None) -> "IsolatedPool":
+    """
+    Get a shared isolated pool, created the first time it is requested
+
+    Parameters:
+        workers (int): Number of worker processes
+        timeout (float | None): Seconds each task may run, None for no limit
+        max_rss (int | None): Bytes of resident memory each worker may use, None for no limit
+
+    Returns:
+        IsolatedPool: The pool
+    """
+    with _lock:
+        pool = _isolated_pools.get((workers, timeout, max_rss))
+
+        if pool is None:
+            pool = IsolatedPool(workers, timeout, max_rss)
+            _isolated_pools[(workers, timeout, max_rss)] = pool
+
+    return pool
+
+def refreshIsolatedPools():
+    """
+    Replace the workers of every isolated pool the next time they are free,
+    so they are forked again from the current state of the process
+    """
+    with _lock:
+        pools = list(_isolated_pools.values())
+
+    for pool in pools:
+        pool.refresh()
+
+def isolatedWorker(connection: Connection):
+    """
+    Loop of an isolated worker process: run each task received and send back its result
+    """
+    while True:
+        task = connection.recv()
+        if task is None:
+            break
+
+        function, argument = task
+        try:
+            connection.send(("ok", function(argument)))
+        except MemoryError:
+            connection.send(("oom", "Out of memory"))
+        except Exception as error:
+            connection.send(("error", repr(error)))
+
+def residentMemory(pid: int) -> int | None:
+    """
+    Get the resident memory of a process in bytes, None when it can not be read
+    """
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return int(statm.read().split()[1]) * sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+class IsolatedPool:
+    """
+    Pool of worker processes that run one task at a time each, under a
+    wall-clock and a resident memory limit
+
+    A worker that goes over a limit is killed and replaced by a new one and
+    its task is reported as "timeout" or "oom", so one task can never hold the
+    rest. Unlike ProcessPoolExecutor, killing a worker does not break the pool.
+    The memory limit relies on /proc and is ignored where it is not available.
+    """
+
+    def __init__(self, workers: int, timeout: float | None, max_rss: int | None):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_rss = max_rss
+        self.processes = [None] * workers
+        self.connections = [None] * workers
+        self.owners = [None] * workers
+        self.stale = [False] * workers
+        self.active = 0
+        self.lock = Lock()
+
+    def start(self, slot: int):
+        """
+        Start, or replace, the worker process of a slot
+        """
+        if self.processes[slot] is not None:
+            self.stop(slot)
+
+        parent, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=isolatedWorker, args=(child,), daemon=True)
+        process.start()
+        child.close()
+
+        self.processes[slot] = process
+        self.connections[slot] = parent
+        self.stale[slot] = False
+
+    def stop(self, slot: int):
+        """
+        Kill the worker process of a slot
+        """
+        self.processes[slot].kill()
+        self.processes[slot].join()
+        self.connections[slot].close()
+        self.processes[slot] = None
+        self.connections[slot] = None
+
+    def refresh(self):
+        """
+        Mark the running workers to be replaced the next time they are free
+        """
+        with self.lock:
+            self.stale = [process is not None for process in self.processes]
+
+    def map(self, function: Callable, items: list) -> Iterator[tuple[int, str, object]]:
+        """
+        Run a function over every item, one item per worker at a time
+
+        Several maps can run at once, from different requests or jobs. The
+        lock only guards the assignment of free workers, and each map takes
+        at most its fair share of them, so a small request is not held behind
+        a big one.
+
+        Parameters:
+            function (Callable): Picklable function of one argument
+            items (list): Arguments of each task
+
+        Returns:
+            Iterator[tuple[int, str, object]]: Index of the item, status and result of
+            each task in completion order. The status is "ok" with the value returned,
+            or "timeout", "oom", "error" or "crashed" with a description
+        """
+        owner = object()
+        pending = list(range(len(items) - 1, -1, -1))
+        running = {}
+
+        with self.lock:
+            self.active += 1
+
+        try:
+            while pending or running:
+                # Reparte tareas a los procesos libres, sin pasar de su parte
+                with self.lock:
+                    share = ceil(self.workers / self.active)
+
+                    for slot in range(self.workers):
+                        if not pending or len(running) >= share:
+                            break
+
+                        if self.owners[slot] is not None:
+                            continue
+
+                        if self.processes[slot] is None or self.stale[slot] or not self.processes[slot].is_alive():
+                            self.start(slot)
+
+                        index = pending.pop()
+                        self.owners[slot] = owner
+                        self.connections[slot].send((function, items[index]))
+                        running[slot] = (index, monotonic())
+
+                if not running:
+                    sleep(POLL_SECONDS)
+                    continue
+
+                ready = wait([self.connections[slot] for slot in running], POLL_SECONDS)
+
+                for slot, (index, started) in list(running.items()):
+                    connection = self.connections[slot]
+
+                    if connection in ready:
+                        try:
+                            status, result = connection.recv()
+                        except (EOFError, OSError):
+                            status, result = "crashed", "Worker process died"
+                            self.stop(slot)
+
+                        if status == "oom" and self.processes[slot] is not None:
+                            self.stop(slot)
+                    elif self.timeout is not None and monotonic() - started > self.timeout:
+                        self.stop(slot)
+                        status, result = "timeout", f"Took more than {self.timeout} seconds"
+                    elif self.max_rss is not None and (residentMemory(self.processes[slot].pid) or 0) > self.max_rss:
+                        self.stop(slot)
+                        status, result = "oom", f"Used more than {self.max_rss} bytes"
+                    else:
+                        continue
+
+                    del running[slot]
+                    self.release(slot)
+                    yield index, status, result
+        finally:
+            # Si el consumidor se detiene, las tareas en curso se descartan
+            for slot in running:
+                self.stop(slot)
+                self.release(slot)
+
+            with self.lock:
+                self.active -= 1
+
+    def release(self, slot: int):
+        """
+        Give the worker of a slot back to the pool
+        """
+        with self.lock:
+            self.owners[slot] = None
@@ -0,0 +1,51 @@
+from random import Random
+import pytest
+from src.use_case.cluster_pairs import clusterPairsUseCase
+
+def randomPairs(seed: int, files_count: int, count: int) -> list[tuple[int, int, float]]:
+    random = Random(seed)
+    pairs = {tuple(sorted(random.sample(range(files_count), 2))) for _ in range(count)}
+    return [(i, j, random.choice([10.0, 25.0, 50.0, 50.0, 90.0])) for i, j in sorted(pairs)]
+
+def components(scored: list[tuple[int, int, float]], files_count: int) -> list[list[int]]:
+    # Recorrido en anchura del grafo de pares
+    neighbours = [set() for _ in range(files_count)]
+    for i, j, _ in scored:
+        neighbours[i].add(j)
+        neighbours[j].add(i)
+
+    seen = set()
+    groups = []
+    for file in range(files_count):
+        if file in seen:
+            continue
+
+        group, pending = {file}, [file]
+        while pending:
+            for other in neighbours[pending.pop()] - group:
+                group.add(other)
+                pending.append(other)
+
+        seen |= group
+        if len(group) > 1:
+            groups.append(sorted(group))
+
+    return groups
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("count", [0, 5, 15, 40])
+def test_clusters_match_connected_components(seed, count):
+    files_count = 30
+    scored = randomPairs(seed, files_count, count)
+    Random(seed).shuffle(scored)
+
+    clusters = clusterPairsUseCase(iter(scored), files_count)
+
+    assert sorted(members for members, _ in clusters) == components(scored, files_count)
+    assert [(-len(members), members[0]) for members, _ in clusters] == sorted((-len(members), members[0]) for members, _ in clusters)
+
+    for members, representative in clusters:
+        inside = [pair for pair in scored if pair[0] in members]
+
+        assert representative in inside
+        assert representative[2] == max(pair[2] for pair in inside)
@@ -0,0 +1,38 @@
+from random import Random
+import pytest
+from src.use_case.compare_join import compareJoinUseCase
+from src.use_case.compare_matrix import compareMatrixUseCase
+from src.use_case.compare_trees import compareTreesUseCase
+
+def randomFingerprints(seed: int) -> list[set[int]]:
+    # Pocos hashes distintos para que haya muchos pares parecidos
+    random = Random(seed)
+    return [
+        {random.randrange(60) for _ in range(random.randint(0, 40))}
+        for _ in range(random.randint(0, 30))
+    ]
+
+def bruteForce(fingerprints: list[set[int]]) -> list[tuple[int, int, float]]:
+    return [
+        (i, j, compareTreesUseCase(fingerprints[i], fingerprints[j]))
+        for i in range(len(fingerprints))
+        for j in range(i + 1, len(fingerprints))
+    ]
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("threshold", [10, 40, 56.25, 100])
+def test_join_matches_brute_force(seed, threshold):
+    fingerprints = randomFingerprints(seed)
+    expected = [pair for pair in bruteForce(fingerprints) if pair[2] >= threshold]
+
+    assert compareJoinUseCase(fingerprints, threshold) == expected
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("block_pairs", [1, 40, 1 << 20])
+def test_matrix_matches_brute_force(seed, block_pairs):
+    fingerprints = randomFingerprints(seed)
+    expected = [pair for pair in bruteForce(fingerprints) if fingerprints[pair[0]] & fingerprints[pair[1]]]
+    scored = list(compareMatrixUseCase(fingerprints, block_pairs))
+
+    assert [(i, j) for i, j, _ in scored] == [(i, j) for i, j, _ in expected]
+    assert [similarity for _, _, similarity in scored] == pytest.approx([similarity for _, _, similarity in expected])
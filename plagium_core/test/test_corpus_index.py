@@ -0,0 +1,89 @@
+from random import Random
+import pytest
+from src.gateways.corpus_index import MIN_STOP_SUBMISSIONS, CorpusIndex
+from src.use_case.compare_trees import compareTreesUseCase, similarityFromCounts
+
+# Hashes que comparten casi todas las entregas, como los de las construcciones más habituales
+COMMON = [Random(n).getrandbits(64) for n in range(40)]
+
+def randomFingerprint(random: Random) -> set[int]:
+    return set(random.sample(COMMON, 30)) | {random.getrandbits(64) for _ in range(random.randint(5, 200))}
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    random = Random(2)
+    fingerprints = [randomFingerprint(random) for _ in range(400)]
+
+    # Casi duplicados de las primeras entregas
+    for k in range(50):
+        fingerprint = set(fingerprints[k])
+        fingerprint.pop()
+        fingerprint.add(random.getrandbits(64))
+        fingerprints.append(fingerprint)
+
+    path = str(tmp_path_factory.mktemp("corpus") / "corpus.sqlite3")
+    index = CorpusIndex(path, "1")
+    for n, fingerprint in enumerate(fingerprints):
+        index.add(f"file{n}.py", f"digest{n}", fingerprint)
+
+    CorpusIndex(path, "2").add("other.py", "digest0", fingerprints[0])
+
+    return index, fingerprints
+
+def similarities(index: CorpusIndex, fingerprint: set[int], min_similarity: float = 0, max_frequency: float = 1) -> dict[str, float]:
+    return {
+        name: similarityFromCounts(matches, len(fingerprint), size)
+        for _, name, size, matches in index.matches(fingerprint, min_similarity, max_frequency)
+    }
+
+def bruteForce(fingerprints: list[set[int]], fingerprint: set[int]) -> dict[str, float]:
+    return {f"file{n}.py": compareTreesUseCase(fingerprint, other) for n, other in enumerate(fingerprints)}
+
+@pytest.mark.parametrize("query", [3, 420, None])
+@pytest.mark.parametrize("min_similarity", [0, 30, 60, 90])
+def test_prefix_keeps_every_submission_above_the_threshold(corpus, query, min_similarity):
+    index, fingerprints = corpus
+    fingerprint = randomFingerprint(Random(3)) if query is None else fingerprints[query]
+
+    found = similarities(index, fingerprint, min_similarity)
+    expected = bruteForce(fingerprints, fingerprint)
+
+    # Las similitudes de las candidatas son exactas y no falta ninguna por encima del umbral
+    assert all(found[name] == pytest.approx(expected[name]) for name in found)
+    assert {name for name, similarity in expected.items() if similarity >= min_similarity and similarity > 0} <= found.keys()
+
+@pytest.mark.parametrize("query", [3, 17, 420])
+def test_stop_list_keeps_the_near_duplicates(corpus, query):
+    index, fingerprints = corpus
+    fingerprint = fingerprints[query]
+
+    found = similarities(index, fingerprint, max_frequency=0.5)
+    expected = bruteForce(fingerprints, fingerprint)
+    top = sorted(expected, key=expected.get, reverse=True)[:2]
+
+    assert len(fingerprints) >= MIN_STOP_SUBMISSIONS
+    assert len(found) < sum(similarity > 0 for similarity in expected.values())
+    assert all(found[name] == pytest.approx(expected[name]) for name in top)
+
+def test_stop_list_waits_for_enough_submissions(tmp_path):
+    random = Random(4)
+    fingerprints = [randomFingerprint(random) for _ in range(MIN_STOP_SUBMISSIONS - 1)]
+    index = CorpusIndex(str(tmp_path / "corpus.sqlite3"), "1")
+    for n, fingerprint in enumerate(fingerprints):
+        index.add(f"file{n}.py", f"digest{n}", fingerprint)
+
+    assert similarities(index, fingerprints[0], max_frequency=0.5) == pytest.approx(bruteForce(fingerprints, fingerprints[0]))
+
+def test_versions_are_kept_apart(corpus):
+    index, fingerprints = corpus
+    other = CorpusIndex(index.path, "2")
+
+    assert index.count() == len(fingerprints)
+    assert other.count() == 1
+    assert similarities(other, fingerprints[0]) == {"other.py": 100}
+
+def test_same_digest_is_added_once(corpus):
+    index, fingerprints = corpus
+
+    assert index.add("copy.py", "digest5", fingerprints[5]) == index.add("file5.py", "digest5", fingerprints[5])
+    assert index.count() == len(fingerprints)
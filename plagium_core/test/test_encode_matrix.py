@@ -0,0 +1,24 @@
+from io import BytesIO
+from itertools import combinations
+from random import Random
+import numpy as np
+import pytest
+from src.use_case.encode_matrix import encodeMatrixUseCase
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("files_count", [0, 1, 2, 7])
+@pytest.mark.parametrize("dtype", ["float16", "float32"])
+def test_condensed_layout_matches_pair_order(seed, files_count, dtype):
+    random = Random(seed)
+    names = [f"file{i}.py" for i in range(files_count)]
+    scored = {(i, j): random.choice([0.0, 33.25, 50.5, 100.0]) for i, j in combinations(range(files_count), 2) if random.random() < 0.7}
+
+    archive = np.load(BytesIO(encodeMatrixUseCase(names, ((i, j, s) for (i, j), s in scored.items()), dtype)))
+    similarity = archive["similarity"]
+
+    # El orden de combinations es el del triángulo superior condensado
+    expected = [scored.get(pair, np.nan) for pair in combinations(range(files_count), 2)]
+
+    assert archive["names"].tolist() == names
+    assert similarity.dtype == np.dtype(dtype)
+    np.testing.assert_array_equal(similarity, np.array(expected, dtype=dtype))
@@ -0,0 +1,37 @@
+from itertools import combinations
+from random import Random
+import pytest
+from src.use_case.filter_pairs import filterPairsUseCase
+
+def randomPairs(seed: int, files_count: int) -> list[tuple[int, int, float]]:
+    # Pocas similitudes distintas para que haya empates
+    random = Random(seed)
+    return [(i, j, random.choice([0.0, 12.5, 40.0, 40.0, 75.0, 100.0])) for i, j in combinations(range(files_count), 2) if random.random() < 0.6]
+
+def bruteForce(scored: list[tuple[int, int, float]], files_count: int, min_similarity: float, top_k_per_file: int) -> list[tuple[int, int, float]]:
+    kept = [pair for pair in scored if pair[2] >= min_similarity]
+    top = set()
+
+    for file in range(files_count):
+        partners = sorted(((similarity, j if i == file else i) for i, j, similarity in kept if file in (i, j)), reverse=True)
+        top.update((min(file, other), max(file, other)) for _, other in partners[:top_k_per_file])
+
+    return sorted(pair for pair in kept if pair[:2] in top)
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("min_similarity", [0, 40])
+def test_without_top_k_keeps_pairs_above_the_minimum_in_order(seed, min_similarity):
+    scored = randomPairs(seed, 12)
+    scored.reverse()
+
+    assert list(filterPairsUseCase(iter(scored), 12, min_similarity)) == [pair for pair in scored if pair[2] >= min_similarity]
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("min_similarity", [0, 40])
+@pytest.mark.parametrize("top_k_per_file", [1, 2, 5, 100])
+def test_top_k_matches_brute_force(seed, min_similarity, top_k_per_file):
+    files_count = 15
+    scored = randomPairs(seed, files_count)
+    Random(seed).shuffle(scored)
+
+    assert filterPairsUseCase(iter(scored), files_count, min_similarity, top_k_per_file) == bruteForce(scored, files_count, min_similarity, top_k_per_file)
@@ -0,0 +1,44 @@
+import pytest
+from src.gateways.fingerprint_cache import FingerprintCache
+
+# Cada huella de diez hashes ocupa 80 bytes empaquetada
+FINGERPRINTS = {f"digest{n}": set(range(n * 10, n * 10 + 10)) for n in range(5)}
+
+@pytest.fixture
+def cache(tmp_path):
+    return FingerprintCache(str(tmp_path / "fingerprints.sqlite3"), 3 * 80, "1")
+
+def test_memory_tier_stays_within_its_bytes(cache):
+    cache.put(FINGERPRINTS)
+
+    assert list(cache.memory) == ["digest2", "digest3", "digest4"]
+    assert cache.memory_bytes == sum(len(data) for data in cache.memory.values()) == 3 * 80
+
+def test_reads_protect_from_eviction(cache):
+    cache.put({digest: FINGERPRINTS[digest] for digest in ("digest0", "digest1", "digest2")})
+    cache.get(["digest0"])
+    cache.put({"digest3": FINGERPRINTS["digest3"]})
+
+    assert list(cache.memory) == ["digest2", "digest0", "digest3"]
+
+def test_evicted_fingerprints_come_back_from_disk(cache):
+    cache.put(FINGERPRINTS)
+
+    assert cache.get(list(FINGERPRINTS) + ["missing"]) == FINGERPRINTS
+
+    # Las leídas de disco vuelven a memoria como las más recientes
+    assert list(cache.memory) == ["digest4", "digest0", "digest1"]
+    assert cache.memory_bytes == 3 * 80
+
+def test_oversized_fingerprint_only_goes_to_disk(cache):
+    big = set(range(100))
+    cache.put({"big": big})
+
+    assert not cache.memory and cache.memory_bytes == 0
+    assert cache.get(["big"]) == {"big": big}
+
+def test_versions_are_kept_apart(cache):
+    cache.put(FINGERPRINTS)
+    other = FingerprintCache(cache.path, cache.max_bytes, "2")
+
+    assert other.get(list(FINGERPRINTS)) == {}
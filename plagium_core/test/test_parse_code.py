@@ -0,0 +1,48 @@
+from glob import glob
+from os.path import dirname, join
+import pytest
+from antlr4 import InputStream, Token
+from src.parser.Python3Lexer import Python3Lexer
+from src.use_case.compare_trees import fingerprintTree
+from src.use_case.parse_code import StartCachingLexerATNSimulator, getRecognizers, parseCode, streamFingerprint
+from benchmarks.parse_backends import syntheticCorpus
+
+EXAMPLES = sorted(glob(join(dirname(__file__), "example*.py")))
+
+# Casos del lexer que dependen de la posición: inicio, sangría, comentarios y errores
+EDGE_CASES = [
+    "",
+    "\n\nx = 1\n",
+    "# comentario\nif x:\n    y = 'a'  # otro\n\telse_ = 2\n",
+    "def f(a,\n      b):\n    return [a,\n            b]\n",
+    "s = '''varias\nlíneas'''\nt = f\"{s!r:>10}\" \\\n    + 'x'\n",
+    "x = 1 $ 2\n  y = ?\n",
+]
+
+def lexTokens(lexer: Python3Lexer) -> list[tuple[int, int, str]]:
+    tokens = []
+    token = lexer.nextToken()
+    while token.type != Token.EOF:
+        tokens.append((token.type, token.channel, token.text))
+        token = lexer.nextToken()
+
+    return tokens
+
+def stockTokens(code: str) -> list[tuple[int, int, str]]:
+    lexer = Python3Lexer(InputStream(code))
+    lexer.removeErrorListeners()
+    return lexTokens(lexer)
+
+@pytest.mark.parametrize("code", [open(path).read() for path in EXAMPLES] + syntheticCorpus(2, 5) + EDGE_CASES)
+def test_start_caching_lexer_matches_stock_lexer(code):
+    lexer, _ = getRecognizers(code)
+    lexer.removeErrorListeners()
+
+    assert isinstance(lexer._interp, StartCachingLexerATNSimulator)
+    assert lexTokens(lexer) == stockTokens(code)
+
+@pytest.mark.parametrize("path", EXAMPLES)
+def test_stream_fingerprint_matches_tree_fingerprint(path):
+    code = open(path).read()
+
+    assert streamFingerprint(code) == fingerprintTree(parseCode(code))
@@ -0,0 +1,51 @@
+from random import Random
+import pytest
+from src.use_case.compare_trees import HASH_BASE, HASH_MASK
+from src.use_case.winnow_tokens import kgramHashes, winnowCode, winnowHashes
+
+def directHash(tokens: list[int]) -> int:
+    hash_value = 0
+    for token in tokens:
+        hash_value = (hash_value * HASH_BASE + token) & HASH_MASK
+
+    return hash_value
+
+def bruteForceWinnow(hashes: list[int], window: int) -> set[int]:
+    # Mínimo más a la derecha de cada ventana, anotado al cambiar de posición
+    window = min(window, len(hashes))
+    selected = set()
+    last = -1
+
+    for start in range(len(hashes) - window + 1):
+        values = hashes[start:start + window]
+        position = start + max(i for i, value in enumerate(values) if value == min(values))
+
+        if position != last:
+            selected.add(hashes[position])
+            last = position
+
+    return selected
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("kgram", [1, 2, 5, 9])
+def test_kgram_hashes_match_direct_hashes(seed, kgram):
+    random = Random(seed)
+    tokens = [random.randrange(1, 100) for _ in range(random.randint(0, 60))]
+
+    assert kgramHashes(tokens, kgram) == [directHash(tokens[i:i + kgram]) for i in range(len(tokens) - kgram + 1)]
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("window", [1, 2, 4, 7, 100])
+def test_winnow_hashes_match_brute_force(seed, window):
+    # Valores pequeños para que haya empates dentro de las ventanas
+    random = Random(seed)
+    hashes = [random.randrange(8) for _ in range(random.randint(0, 60))]
+
+    assert winnowHashes(hashes, window) == bruteForceWinnow(hashes, window)
+
+def test_renamed_code_has_the_same_fingerprint():
+    code = "def total(items):\n    result = 0\n    for item in items:\n        result += item * 2\n    return result\n"
+    renamed = code.replace("total", "suma").replace("items", "xs").replace("item", "x").replace("2", "3")
+
+    assert winnowCode(code) == winnowCode(renamed)
+    assert winnowCode(code) != winnowCode(code.replace("+=", "-="))
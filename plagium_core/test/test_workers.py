@@ -0,0 +1,79 @@
+import os
+from time import sleep
+import pytest
+from src.workers import IsolatedPool
+
+def square(value: int) -> int:
+    return value * value
+
+def nap(seconds: float) -> float:
+    sleep(seconds)
+    return seconds
+
+def raiseMemoryError(_):
+    raise MemoryError
+
+def allocate(_):
+    # Memoria residente de sobra para pasar el límite antes del tiempo máximo
+    data = bytearray(256 * 1024 * 1024)
+    sleep(60)
+    return len(data)
+
+def die(_):
+    os._exit(1)
+
+@pytest.fixture
+def pool():
+    pool = IsolatedPool(2, timeout=2, max_rss=128 * 1024 * 1024)
+    yield pool
+
+    for slot in range(pool.workers):
+        if pool.processes[slot] is not None:
+            pool.stop(slot)
+
+def workerPids(pool: IsolatedPool) -> set[int]:
+    return {process.pid for process in pool.processes if process is not None}
+
+def test_map_returns_every_result(pool):
+    results = sorted(pool.map(square, list(range(10))))
+
+    assert results == [(i, "ok", i * i) for i in range(10)]
+
+@pytest.mark.parametrize("function, argument, status", [
+    (nap, 60, "timeout"),
+    (raiseMemoryError, None, "oom"),
+    (allocate, None, "oom"),
+    (die, None, "crashed"),
+])
+def test_failed_task_replaces_its_worker(pool, function, argument, status):
+    list(pool.map(square, [1, 2]))
+    before = workerPids(pool)
+
+    [(_, failed, _)] = pool.map(function, [argument])
+    list(pool.map(nap, [0.2, 0.2]))
+    after = workerPids(pool)
+
+    assert failed == status
+    assert len(before) == len(after) == 2
+    assert len(before & after) == 1
+    assert pool.owners == [None, None]
+    assert pool.active == 0
+
+def test_closed_map_releases_its_workers(pool):
+    results = pool.map(nap, [0, 30, 30])
+    next(results)
+    started = workerPids(pool)
+    results.close()
+
+    # Solo se mata el proceso con una tarea en curso
+    assert pool.owners == [None, None]
+    assert pool.active == 0
+    assert len(started) == 2 and len(workerPids(pool)) == 1
+
+def test_small_map_is_not_held_behind_a_big_one(pool):
+    big = pool.map(nap, [1] * 6)
+    next(big)
+
+    # Con dos mapas activos cada uno tiene derecho a un proceso
+    assert sorted(pool.map(square, [2, 3])) == [(0, "ok", 4), (1, "ok", 9)]
+    big.close()